@@ -0,0 +1,277 @@
+"""
+So sánh đường phục vụ sync (app.py, Flask) và async (asgi_app.py, Starlette +
+AsyncElasticsearch) khi có nhiều request đồng thời tới /search hoặc /view_pdf.
+
+Cả hai server chạy trong process riêng, mỗi loại một process, cùng trỏ tới một
+server giả lập Elasticsearch (xem bench_search_load.py, trả lời sau --latency ms):
+    sync:  Flask trên server WSGI với pool --sync-threads thread, mỗi request
+           một kết nối (tương tự gunicorn worker gthread/sync)
+    async: uvicorn với asgi_app:app, một worker
+Client (aiohttp) gửi --requests request với từng mức concurrency, mỗi request
+/search một JD khác nhau để không trúng cache. Kết quả (p50/p99, request/s,
+số lỗi) in ra dạng JSON. Chạy từ thư mục gốc của repo:
+
+    python -m benchmarks.bench_async [--concurrency 10 100 300] [--endpoint search|pdf]
+
+Cần starlette, uvicorn, aiohttp và python-multipart.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks.bench_search_load import StandInHandler, StandInServer
+from benchmarks.synthetic_cvs import generate_corpus
+from source.blob_store import LocalBlobStore
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'source')
+MODES = ("sync", "async")
+
+
+class DocStandInHandler(StandInHandler):
+    """Như StandInHandler, nhưng GET .../_doc/<id> trả về CV có cv_sha256 = server.pdf_sha256."""
+
+    def _respond(self):
+        if '/_doc/' not in self.path:
+            return super()._respond()
+        time.sleep(self.server.latency)
+        body = json.dumps({
+            '_index': 'cvs_v1', '_id': self.path.rsplit('/', 1)[-1].split('?')[0], 'found': True,
+            '_source': {'cv_sha256': self.server.pdf_sha256, 'cv_size': self.server.pdf_size}
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = _respond
+
+
+def run_stand_in(latency: float, pdf_sha256: str, pdf_size: int, port_queue) -> None:
+    server = StandInServer(('127.0.0.1', 0), DocStandInHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.pdf_sha256 = pdf_sha256
+    server.pdf_size = pdf_size
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def serve_sync(port: int, threads: int) -> None:
+    """Chạy app Flask trên server WSGI với pool thread cố định (mỗi request một kết nối)."""
+    from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+    sys.path.insert(0, SOURCE_DIR)
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    class PooledWSGIServer(BaseWSGIServer):
+        request_queue_size = 1024
+
+        def __init__(self):
+            super().__init__('127.0.0.1', port, app, handler=QuietHandler)
+            self.pool = ThreadPoolExecutor(max_workers=threads)
+
+        def process_request(self, request, client_address):
+            self.pool.submit(self._process_request, request, client_address)
+
+        def _process_request(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    PooledWSGIServer().serve_forever()
+
+
+def serve_async(port: int) -> None:
+    import uvicorn
+
+    sys.path.insert(0, SOURCE_DIR)
+    uvicorn.run('asgi_app:app', host='127.0.0.1', port=port, log_level='warning',
+                backlog=1024, access_log=False)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode: str, port: int, args, env: Dict, work_dir: str) -> subprocess.Popen:
+    command = [sys.executable, '-m', 'benchmarks.bench_async', '--serve', mode, '--port', str(port),
+               '--sync-threads', str(args.sync_threads)]
+    # Server chạy trong thư mục tạm (uploads/, jobs.db của app.py), import qua PYTHONPATH
+    env = dict(env, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')])))
+    with open(os.path.join(work_dir, f'{mode}.log'), 'ab') as log:
+        return subprocess.Popen(command, cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+async def wait_ready(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f'http://127.0.0.1:{port}/stats') as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server on port {port} did not start")
+            await asyncio.sleep(0.2)
+
+
+async def run_load(port: int, endpoint: str, concurrency: int, requests: int, run_id: str) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=120)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    if endpoint == 'search':
+                        request = session.post(f'http://127.0.0.1:{port}/search', json={
+                            'requirements': f'Python developer {run_id} {i}', 'responsibilities': f'Build APIs {i}'
+                        })
+                    else:
+                        request = session.get(f'http://127.0.0.1:{port}/view_pdf/{run_id}-{i}')
+                    async with request as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                            return
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {'concurrency': concurrency, 'requests': requests, 'errors': errors,
+              'requests_per_s': len(latencies) / elapsed}
+    if latencies:
+        result.update({
+            'p50_ms': 1000 * statistics.median(latencies),
+            'p99_ms': 1000 * latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+            'max_ms': 1000 * latencies[-1],
+        })
+    return result
+
+
+async def bench_mode(mode: str, args, env: Dict, work_dir: str) -> List[Dict]:
+    port = free_port()
+    server = start_server(mode, port, args, env, work_dir)
+    try:
+        try:
+            await wait_ready(port)
+        except RuntimeError:
+            with open(os.path.join(work_dir, f'{mode}.log'), 'r', encoding='utf-8', errors='replace') as log:
+                sys.stderr.write(log.read()[-4000:])
+            raise
+        # Làm nóng pool kết nối tới Elasticsearch trước khi đo
+        await run_load(port, args.endpoint, min(args.concurrency), min(args.concurrency) * 5, 'warmup')
+        runs = []
+        for concurrency in args.concurrency:
+            result = await run_load(port, args.endpoint, concurrency, args.requests, f'{mode}{concurrency}')
+            print(f"{mode:5}  concurrency {concurrency:4}: {result['requests_per_s']:7.0f} req/s  "
+                  f"p50 {result.get('p50_ms', 0):7.1f} ms  p99 {result.get('p99_ms', 0):7.1f} ms  "
+                  f"errors {result['errors']}", file=sys.stderr)
+            runs.append(result)
+        return runs
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint', choices=('search', 'pdf'), default='search')
+    parser.add_argument('--latency', type=float, default=20, help='Độ trễ (ms) của server giả lập Elasticsearch')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--requests', type=int, default=3000, help='Số request cho mỗi mức concurrency')
+    parser.add_argument('--sync-threads', type=int, default=16, help='Số thread của server sync')
+    parser.add_argument('--es-connections', type=int, default=50, help='connections_per_node của client ES')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--output', help='Ghi kết quả JSON vào file thay vì stdout')
+    # Dùng nội bộ: chạy một server trong process con
+    parser.add_argument('--serve', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve == 'sync':
+        return serve_sync(args.port, args.sync_threads)
+    if args.serve == 'async':
+        return serve_async(args.port)
+
+    work_dir = tempfile.mkdtemp(prefix='bench_async_')
+    stand_in = None
+    try:
+        # PDF mà mọi CV của server giả lập trỏ tới (dùng cho --endpoint pdf)
+        blob_dir = os.path.join(work_dir, 'blobs')
+        _, pdf_bytes = next(generate_corpus(1))
+        pdf_sha256, pdf_size = LocalBlobStore(blob_dir).put(pdf_bytes)
+
+        port_queue = multiprocessing.Queue()
+        stand_in = multiprocessing.Process(target=run_stand_in, daemon=True,
+                                           args=(args.latency / 1000, pdf_sha256, pdf_size, port_queue))
+        stand_in.start()
+        env = dict(os.environ, ES_HOST='127.0.0.1', ES_PORT=str(port_queue.get(timeout=10)), ES_SCHEME='http',
+                   ES_CONNECTIONS_PER_NODE=str(args.es_connections), SEARCH_BACKEND='elastic',
+                   CV_BLOB_DIR=blob_dir, JOBS_DB=os.path.join(work_dir, 'jobs.db'), PARSE_WORKERS='1')
+
+        results = {
+            'benchmark': 'async_serving',
+            'timestamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'params': {'endpoint': args.endpoint, 'latency_ms': args.latency, 'requests': args.requests,
+                       'sync_threads': args.sync_threads, 'es_connections': args.es_connections},
+            'modes': {},
+        }
+        for mode in args.modes:
+            results['modes'][mode] = asyncio.run(bench_mode(mode, args, env, work_dir))
+    finally:
+        if stand_in is not None:
+            stand_in.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Benchmark toàn bộ pipeline trên bộ CV giả (xem synthetic_cvs.py) với
+LocalSearchBackend, không cần cluster Elasticsearch.
+
+Đo thông lượng và độ trễ từng giai đoạn ingest:
+    extract (pdfplumber) -> clean -> parse -> encode (blob store, skill_ids) -> index
+rồi độ trễ tìm kiếm (p50/p95/p99) với các JD ngẫu nhiên. Thời gian sinh PDF
+không được tính. Kết quả in ra dạng JSON (hoặc ghi vào --output) để so sánh
+giữa các lần chạy. Chạy từ thư mục gốc của repo:
+
+    python -m benchmarks.bench_pipeline [--scale 1000 10000 100000] [--output results.json]
+
+Quy mô 100k mất khá lâu (giai đoạn extract chiếm phần lớn thời gian).
+"""
+import argparse
+import io
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.synthetic_cvs import generate_corpus, generate_queries
+from source.blob_store import LocalBlobStore
+from source.local_search import LocalSearchBackend
+from source.pdf_processor import Processor
+
+STAGES = ("extract", "clean", "parse", "encode", "index")
+
+
+def percentiles(samples: List[float]) -> Dict:
+    """Các phân vị (ms) của danh sách thời gian (giây)."""
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def at(q):
+        return 1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        'mean_ms': 1000 * statistics.fmean(ordered),
+        'p50_ms': at(0.50),
+        'p95_ms': at(0.95),
+        'p99_ms': at(0.99),
+        'max_ms': 1000 * ordered[-1],
+    }
+
+
+def bench_scale(count: int, queries: int, batch_size: int, seed: int, work_dir: str) -> Dict:
+    processor = Processor(blob_store=LocalBlobStore(f"{work_dir}/blobs"))
+    backend = LocalSearchBackend(index_dir=f"{work_dir}/index")
+    timings = {stage: [] for stage in STAGES}
+
+    def index_batch(batch):
+        start = time.perf_counter()
+        backend.index_cvs(batch)
+        # Thời gian index của cả batch chia đều cho từng CV
+        timings['index'].extend([(time.perf_counter() - start) / len(batch)] * len(batch))
+
+    # Nạp cả corpus trong bulk_load như ingest CLI: index chỉ được ghi ra đĩa một lần khi kết thúc
+    batch = []
+    with backend.bulk_load():
+        for file_name, pdf_bytes in generate_corpus(count, seed):
+            t0 = time.perf_counter()
+            pages = list(processor.iter_pdf_pages(io.BytesIO(pdf_bytes)))
+            t1 = time.perf_counter()
+            cleaned = processor.clean_text(pages)
+            t2 = time.perf_counter()
+            sections = processor.parse_resume(cleaned)
+            t3 = time.perf_counter()
+            batch.append(processor.transform_sections(sections, pdf_bytes, file_name))
+            t4 = time.perf_counter()
+            for stage, seconds in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+                timings[stage].append(seconds)
+            if len(batch) >= batch_size:
+                index_batch(batch)
+                batch = []
+        if batch:
+            index_batch(batch)
+        flush_start = time.perf_counter()
+    # Lần flush cuối (khi thoát bulk_load) thuộc giai đoạn index, chia đều cho từng CV
+    flush_per_doc = (time.perf_counter() - flush_start) / max(len(timings['index']), 1)
+    timings['index'] = [seconds + flush_per_doc for seconds in timings['index']]
+
+    search_latencies = []
+    for requirements, responsibilities in generate_queries(queries):
+        start = time.perf_counter()
+        backend.search_cv_by_jd(requirements, responsibilities, size=10)
+        search_latencies.append(time.perf_counter() - start)
+    backend.close()
+
+    stages = {}
+    for stage in STAGES:
+        total = sum(timings[stage])
+        stages[stage] = dict(percentiles(timings[stage]), total_s=total,
+                             docs_per_s=len(timings[stage]) / total if total else None)
+    ingest_total = sum(stages[stage]['total_s'] for stage in STAGES)
+    return {
+        'docs': count,
+        'ingest': {'total_s': ingest_total, 'docs_per_s': count / ingest_total if ingest_total else None,
+                   'stages': stages},
+        'search': dict(percentiles(search_latencies), queries=queries),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, nargs='+', default=[1000], help='Số CV cho mỗi lần chạy')
+    parser.add_argument('--queries', type=int, default=200, help='Số JD dùng để đo tìm kiếm')
+    parser.add_argument('--batch-size', type=int, default=500, help='Số CV mỗi lần gọi index_cvs')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Ghi kết quả JSON vào file thay vì stdout')
+    args = parser.parse_args()
+
+    results = {
+        'benchmark': 'pipeline',
+        'timestamp': datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'params': {'queries': args.queries, 'batch_size': args.batch_size, 'seed': args.seed},
+        'runs': [],
+    }
+    for count in args.scale:
+        work_dir = tempfile.mkdtemp(prefix='bench_pipeline_')
+        try:
+            results['runs'].append(bench_scale(count, args.queries, args.batch_size, args.seed, work_dir))
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        run = results['runs'][-1]
+        print(f"{count} docs: ingest {run['ingest']['docs_per_s']:.1f} docs/s, "
+              f"search p99 {run['search']['p99_ms']:.2f} ms", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Load test cho ElasticHandler.search_cv_by_jd: đo độ trễ p50/p99 khi có nhiều
+request tìm kiếm đồng thời, với các kích thước pool kết nối khác nhau.
+
+Mặc định chạy với một server giả lập Elasticsearch trong process (trả về
+kết quả cố định sau --latency ms), nên không cần cluster; dùng --url để chạy
+với cluster thật. Cache kết quả tìm kiếm được tắt để mọi request đều tới server.
+Chạy từ thư mục gốc của repo:
+
+    python -m benchmarks.bench_search_load [--concurrency 1 10 25 50] [--pool-sizes 10 50]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from source.elastic_handler import ElasticHandler
+from source.es_client import get_es_client, load_es_settings
+
+SEARCH_RESPONSE = json.dumps({
+    'took': 1,
+    'timed_out': False,
+    'hits': {
+        'total': {'value': 1, 'relation': 'eq'},
+        'max_score': 1.0,
+        'hits': [{'_index': 'cvs', '_id': 'stand-in', '_score': 1.0,
+                  '_source': {'cv_id': 'stand-in', 'metadata': {'file_name': 'stand-in.pdf'}}}]
+    }
+}).encode('utf-8')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Trả lời mọi request như Elasticsearch 8, chờ server.latency giây trước khi trả."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        time.sleep(self.server.latency)
+        body = SEARCH_RESPONSE if '_search' in self.path else b'{"version": {"number": "8.0.0"}}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('X-Elastic-Product', 'Elasticsearch')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_HEAD = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    # Backlog đủ lớn để kết nối mới không bị SYN retry khi nhiều client mở cùng lúc
+    request_queue_size = 256
+
+
+def start_stand_in(latency: float):
+    server = StandInServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_load(handler: ElasticHandler, concurrency: int, requests: int):
+    def one(i):
+        start = time.perf_counter()
+        # Query khác nhau cho mỗi request (cache đã tắt, nhưng tránh mọi cache phía server)
+        handler.search_cv_by_jd(f"Python developer {i}", f"Build APIs {i}")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(one, range(requests)))
+    return {
+        'p50_ms': 1000 * statistics.median(latencies),
+        'p99_ms': 1000 * latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))],
+        'max_ms': 1000 * latencies[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Cluster Elasticsearch thật (vd. http://localhost:9200)')
+    parser.add_argument('--latency', type=float, default=20, help='Độ trễ (ms) của server giả lập')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 25, 50])
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[10, 50])
+    parser.add_argument('--requests', type=int, default=500, help='Số request cho mỗi mức concurrency')
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port, scheme = url.hostname, url.port or 9200, url.scheme
+    else:
+        server = start_stand_in(args.latency / 1000)
+        host, port, scheme = '127.0.0.1', server.server_address[1], 'http'
+
+    for pool_size in args.pool_sizes:
+        settings = load_es_settings(host=host, port=port, scheme=scheme, connections_per_node=pool_size)
+        handler = ElasticHandler(host=host, port=port, scheme=scheme, cache_size=0, client=get_es_client(settings))
+        for concurrency in args.concurrency:
+            result = run_load(handler, concurrency, args.requests)
+            print(f"pool {pool_size:3}  concurrency {concurrency:3}: p50 {result['p50_ms']:7.1f} ms  "
+                  f"p99 {result['p99_ms']:7.1f} ms  max {result['max_ms']:7.1f} ms")
+
+    if server is not None:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Benchmark thời gian khởi động của source/app.py: từ lúc import đến khi
+request đầu tiên được trả về, kèm RSS tối đa của process.
+
+Mỗi lần đo chạy trong một process Python mới để không bị ảnh hưởng bởi
+module đã import. Chạy từ thư mục gốc của repo:
+
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'source')
+
+# Chạy trong thư mục source/ giống như `python app.py`
+PROBE = """
+import json, resource, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/')
+assert response.status_code == 200
+first_request = time.perf_counter()
+print(json.dumps({
+    'import_s': imported - start,
+    'first_request_s': first_request - start,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def run_once():
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=SOURCE_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    for key in ('import_s', 'first_request_s', 'max_rss_mb'):
+        values = [run[key] for run in runs]
+        print(f"{key:16}: median {statistics.median(values):8.3f}  max {max(values):8.3f}")
+
+
+if __name__ == '__main__':
+    main()
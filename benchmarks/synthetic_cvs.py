@@ -0,0 +1,142 @@
+"""
+Sinh CV giả (PDF) theo bố cục mà Processor.parse_resume mong đợi:
+Contact Information / Profile / Experiences / Education / Skills.
+
+PDF được viết trực tiếp (font Helvetica chuẩn, không cần thư viện ngoài) nên
+sinh được hàng trăm nghìn CV nhanh, có thể giữ trong bộ nhớ hoặc ghi ra thư mục.
+Cùng seed luôn cho cùng bộ CV. Chạy từ thư mục gốc của repo:
+
+    python -m benchmarks.synthetic_cvs OUT_DIR [--count 1000] [--seed 42]
+"""
+import argparse
+import json
+import os
+import random
+import textwrap
+from typing import Iterator, List, Tuple
+
+from source.skill_taxonomy import DEFAULT_TAXONOMY_PATH
+
+with open(DEFAULT_TAXONOMY_PATH, 'r', encoding='utf-8') as f:
+    SKILL_NAMES = [skill['name'] for skill in json.load(f).values()]
+
+FIRST_NAMES = ["An", "Binh", "Chi", "Dung", "Giang", "Hanh", "Khoa", "Linh", "Minh", "Nam",
+               "Oanh", "Phuong", "Quang", "Son", "Thao", "Trung", "Uyen", "Viet", "Xuan", "Yen"]
+LAST_NAMES = ["Nguyen", "Tran", "Le", "Pham", "Hoang", "Vu", "Dang", "Bui", "Do", "Ngo"]
+TITLES = ["Software Engineer", "Frontend Developer", "Backend Developer", "Data Analyst",
+          "Accountant", "Marketing Specialist", "DevOps Engineer", "QA Engineer", "Financial Analyst"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Ltd", "Hooli", "Vandelay Industries",
+             "Stark Solutions", "Wayne Finance", "Soylent Foods", "Tyrell Systems"]
+SCHOOLS = ["Hanoi University of Science and Technology", "Foreign Trade University",
+           "National Economics University", "Ho Chi Minh City University of Technology"]
+DEGREES = ["Bachelor of Computer Science", "Bachelor of Accounting", "Bachelor of Finance",
+           "Master of Information Systems", "Bachelor of Marketing"]
+# Không dùng các từ tiêu đề viết hoa (Profile, Skills, ...) trong nội dung để không cắt nhầm mục
+VERBS = ["built", "designed", "maintained", "improved", "automated", "migrated", "analyzed",
+         "reconciled", "prepared", "led", "supported", "optimized", "reviewed", "delivered"]
+OBJECTS = ["payment services", "internal dashboards", "monthly financial reports", "REST APIs",
+           "marketing campaigns", "data pipelines", "test suites", "deployment workflows",
+           "customer onboarding flows", "bank statements", "budget forecasts", "web applications"]
+OUTCOMES = ["reducing latency by {n}%", "saving {n} hours per month", "for {n} enterprise clients",
+            "with {n}% fewer defects", "across {n} teams", "increasing conversion by {n}%"]
+
+LINE_WIDTH = 95
+LINES_PER_PAGE = 52
+
+
+def _sentence(rng: random.Random) -> str:
+    skill = rng.choice(SKILL_NAMES)
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(2, 60))
+    return f"{rng.choice(VERBS).capitalize()} {rng.choice(OBJECTS)} using {skill}, {outcome}."
+
+
+def generate_cv_lines(rng: random.Random) -> List[str]:
+    """Các dòng văn bản của một CV ngẫu nhiên."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    title = rng.choice(TITLES)
+    lines = [name, title, "", "Contact Information",
+             f"Email: {name.lower().replace(' ', '.')}{rng.randint(1, 999)}@example.com",
+             f"Phone: +84 9{rng.randint(10000000, 99999999)}", "Address: Hanoi, Vietnam", "", "Profile"]
+    lines += textwrap.wrap(
+        f"{title} with {rng.randint(1, 15)} years in the industry. " + " ".join(_sentence(rng) for _ in range(3)),
+        LINE_WIDTH
+    )
+    lines += ["", "Experiences"]
+    for _ in range(rng.randint(2, 4)):
+        start = rng.randint(2008, 2022)
+        lines.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        for _ in range(rng.randint(2, 5)):
+            lines += textwrap.wrap(f"- {_sentence(rng)}", LINE_WIDTH)
+    lines += ["", "Education", f"{rng.choice(DEGREES)}, {rng.choice(SCHOOLS)} ({rng.randint(2005, 2022)})",
+              f"GPA: {rng.uniform(2.8, 4.0):.2f}/4.0", "", "Skills"]
+    lines += textwrap.wrap(", ".join(rng.sample(SKILL_NAMES, rng.randint(5, 14))), LINE_WIDTH)
+    return lines
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(lines: List[str]) -> bytes:
+    """Viết một PDF tối giản (A4, Helvetica 10pt), mỗi phần tử của lines là một dòng."""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    # Object 1: catalog, 2: pages, 3: font, sau đó mỗi trang gồm (page, content)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(
+            f"({_escape(line)}) Tj T*" for line in page_lines
+        ) + " ET"
+        stream = stream.encode('cp1252', errors='replace')
+        page_number = len(objects) + 1
+        kids.append(f"{page_number} 0 R")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_number + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def generate_corpus(count: int, seed: int = 42) -> Iterator[Tuple[str, bytes]]:
+    """Sinh lần lượt count CV dạng (tên file, nội dung PDF)."""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield f"synthetic_{seed}_{i:06d}.pdf", make_pdf(generate_cv_lines(rng))
+
+
+def generate_queries(count: int, seed: int = 7) -> Iterator[Tuple[str, str]]:
+    """Sinh lần lượt count JD dạng (requirements, responsibilities)."""
+    rng = random.Random(seed)
+    for _ in range(count):
+        requirements = "Proficiency in " + ", ".join(rng.sample(SKILL_NAMES, rng.randint(3, 6)))
+        responsibilities = " ".join(_sentence(rng) for _ in range(rng.randint(2, 4)))
+        yield requirements, responsibilities
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('out_dir')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for file_name, pdf_bytes in generate_corpus(args.count, args.seed):
+        with open(os.path.join(args.out_dir, file_name), 'wb') as f:
+            f.write(pdf_bytes)
+    print(f"Wrote {args.count} CVs to {args.out_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,49 @@
 # app.py
-from flask import Flask, render_template, request, send_file, jsonify
+from flask import Flask, Request, Response, g, render_template, request, jsonify
 import os
 import io
 import base64
+from werkzeug.exceptions import HTTPException, RequestedRangeNotSatisfiable
 from werkzeug.utils import secure_filename
-from elastic_handler import ElasticHandler
+from werkzeug.wsgi import wrap_file
+from elastic_handler import compact_hits
+from search_api import MAX_SEARCH_SIZE, PDF_SOURCE_FIELDS, next_page, parse_paging, stream_ndjson
+from search_backend import create_search_backend
 from pdf_processor import Processor
+from blob_store import LocalBlobStore
+from job_queue import JobQueue, IngestWorkerPool
+from metrics import HTTP_REQUEST_SECONDS, REGISTRY, SamplingProfiler
 import logging
+import random
+import tempfile
+import time
+import uuid
+
+class UploadRequest(Request):
+    """File upload được giữ trong bộ nhớ, chỉ ghi ra file tạm khi lớn hơn UPLOAD_SPOOL_THRESHOLD."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=app.config['UPLOAD_SPOOL_THRESHOLD'])
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['UPLOAD_SPOOL_THRESHOLD'] = int(os.environ.get('UPLOAD_SPOOL_THRESHOLD', 4 * 1024 * 1024))
+# Upload bất đồng bộ: /upload trả về job id ngay, file được xử lý bởi worker nền
+app.config['ASYNC_UPLOADS'] = os.environ.get('ASYNC_UPLOADS', '0') == '1'
+app.config['JOBS_DB'] = os.environ.get('JOBS_DB', 'jobs.db')
+app.config['INGEST_WORKERS'] = int(os.environ.get('INGEST_WORKERS', '2'))
+# Sampling profiler (tắt mặc định): khi PROFILE_REQUESTS=1, request có ?profile=1 hoặc header
+# X-Profile: 1 luôn được lưu; ngoài ra một tỉ lệ PROFILE_SAMPLE_RATE request được lấy mẫu và
+# chỉ lưu nếu chậm hơn PROFILE_SLOW_MS. File dạng collapsed stacks nằm trong PROFILE_DIR.
+app.config['PROFILE_REQUESTS'] = os.environ.get('PROFILE_REQUESTS', '0') == '1'
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+app.config['PROFILE_SLOW_MS'] = float(os.environ.get('PROFILE_SLOW_MS', '1000'))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', 'profiles')
+
+# Số JD tối đa trong một request /search/batch
+MAX_BATCH_JDS = 100
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -19,9 +52,45 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Elasticsearch handler
-es_handler = ElasticHandler()
-processor = Processor()
+# Initialize search backend (Elasticsearch mặc định, SEARCH_BACKEND=local để chạy không cần cluster)
+es_handler = create_search_backend()
+if os.environ.get('RERANK', '0') == '1':
+    # Xếp hạng lại kết quả bằng embedding (numpy, model local tùy chọn qua RERANK_MODEL)
+    from reranker import DEFAULT_STORE_DIR, Reranker
+    es_handler.reranker = Reranker(store_dir=os.environ.get('RERANK_STORE', DEFAULT_STORE_DIR))
+blob_store = LocalBlobStore()
+processor = Processor(blob_store=blob_store)
+job_queue = JobQueue(app.config['JOBS_DB'])
+ingest_workers = IngestWorkerPool(job_queue, processor, es_handler, workers=app.config['INGEST_WORKERS'])
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if app.config['PROFILE_REQUESTS']:
+        g.profile_forced = request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'
+        if g.profile_forced or random.random() < app.config['PROFILE_SAMPLE_RATE']:
+            g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.request_started
+    # Dùng rule của route (vd. /pdf/<doc_id>) thay vì URL để số nhãn không tăng theo id
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method, status=str(response.status_code))
+
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        if g.profile_forced or elapsed * 1000 >= app.config['PROFILE_SLOW_MS']:
+            os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+            profile_path = os.path.join(
+                app.config['PROFILE_DIR'],
+                f"{time.strftime('%Y%m%dT%H%M%S')}-{secure_filename(endpoint) or 'root'}-{uuid.uuid4().hex[:8]}.folded"
+            )
+            with open(profile_path, 'w', encoding='utf-8') as f:
+                f.write(profiler.collapsed())
+            logger.warning(f"{request.method} {request.path} took {elapsed * 1000:.0f} ms, profile saved to {profile_path}")
+    return response
 
 @app.route('/')
 def index():
@@ -33,15 +102,16 @@ def upload_files():
         return jsonify({'error': 'No files provided'}), 400
 
     files = request.files.getlist('files[]')
+    if request.args.get('async', '1' if app.config['ASYNC_UPLOADS'] else '0') == '1':
+        return enqueue_files(files)
+
     processed_files = []
 
     for file in files:
         if file and file.filename.endswith('.pdf'):
             filename = secure_filename(file.filename)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
-
-            cv_data = processor.process_pdf(file_path)
+            # Parse trực tiếp từ nội dung upload, không ghi ra thư mục uploads
+            cv_data = processor.process_pdf(file.stream, file_name=filename)
             if cv_data:
                 try:
                     doc_id = es_handler.index_cv(cv_data)
@@ -56,63 +126,252 @@ def upload_files():
                         'status': 'error',
                         'message': str(e)
                     })
-            
-            # Clean up uploaded file
-            os.remove(file_path)
 
     return jsonify({'processed_files': processed_files})
 
+def enqueue_files(files):
+    """Lưu file vào thư mục upload và tạo job ingest, trả về job id ngay."""
+    queued_files = []
+    for file in files:
+        if file and file.filename.endswith('.pdf'):
+            filename = secure_filename(file.filename)
+            # Mỗi file một thư mục riêng để các file trùng tên không ghi đè nhau
+            file_dir = os.path.join(app.config['UPLOAD_FOLDER'], uuid.uuid4().hex)
+            os.makedirs(file_dir)
+            file_path = os.path.join(file_dir, filename)
+            file.save(file_path)
+            queued_files.append((filename, file_path))
+
+    if not queued_files:
+        return jsonify({'error': 'No PDF files provided'}), 400
+
+    job_id = job_queue.create_job(queued_files)
+    ingest_workers.start()
+    ingest_workers.notify()
+    return jsonify({'job_id': job_id, 'total': len(queued_files), 'status_url': f'/jobs/{job_id}'}), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({'search_cache': es_handler.cache_stats()})
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Histogram thời gian (Processor, search backend, HTTP) và thống kê cache, dạng text của Prometheus."""
+    gauges = {
+        f"search_cache_{key}": (f"Search result cache {key}.", value)
+        for key, value in es_handler.cache_stats().items()
+    }
+    return Response(REGISTRY.render(gauges), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/search', methods=['POST'])
 def search_cvs():
+    """
+    Tìm CV theo JD, trả về danh sách hit gọn (id, score, highlights, metadata).
+
+    Phân trang bằng "from"/"size"; để phân trang sâu gửi "deep": true ở trang đầu,
+    sau đó gửi lại "pit_id" và "search_after" nhận được trong "next".
+    Thêm ?format=ndjson (hoặc Accept: application/x-ndjson) để nhận kết quả dạng stream NDJSON.
+    """
     data = request.get_json()
-    print("Received data:", data)
     requirements = data.get('requirements', '')
     responsibilities = data.get('responsibilities', '')
     
     try:
-        results = es_handler.search_cv_by_jd(
-            job_requirements=str(requirements),
-            job_responsibilities=str(responsibilities),
-        )
-        results_dict = results.body
-        return jsonify(results_dict)
+        size, from_ = parse_paging(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    pit_id = data.get('pit_id')
+    search_after = data.get('search_after')
+
+    try:
+        if data.get('rerank') and es_handler.reranker is not None and pit_id is None and not data.get('deep'):
+            if from_ + size > es_handler.reranker.window:
+                return jsonify({'error': f'from + size must not exceed {es_handler.reranker.window} when re-ranking'}), 400
+            response = es_handler.search_cv_by_jd_reranked(
+                job_requirements=str(requirements),
+                job_responsibilities=str(responsibilities),
+                size=size,
+                from_=from_
+            )
+        else:
+            if data.get('deep') and pit_id is None:
+                pit_id = es_handler.open_point_in_time()
+            response = es_handler.search_cv_by_jd(
+                job_requirements=str(requirements),
+                job_responsibilities=str(responsibilities),
+                size=size,
+                from_=from_,
+                search_after=search_after,
+                pit_id=pit_id
+            )
     except Exception as e:
-        print("Error during search:", str(e))
+        logger.error(f"Error during search: {str(e)}")
         return jsonify({'error': str(e)}), 500
-    
-@app.route('/pdf/<doc_id>', methods=['GET'])
-def get_pdf(doc_id):
+
+    next_ = next_page(response, size, from_, pit_id)
+    if next_ is None and pit_id is not None:
+        # Trang cuối của deep paging: đóng point-in-time thay vì chờ hết keep_alive
+        try:
+            es_handler.close_point_in_time(response.get('pit_id') or pit_id)
+        except Exception as e:
+            logger.warning(f"Error closing point in time: {str(e)}")
+
+    if request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson':
+        return Response(stream_ndjson(response, next_), mimetype='application/x-ndjson')
+    results = compact_hits(response)
+    results['next'] = next_
+    return jsonify(results)
+
+@app.route('/search/batch', methods=['POST'])
+def search_batch():
+    """
+    Tìm CV cho nhiều JD trong một request (một round trip _msearch tới Elasticsearch).
+
+    Body: {"jds": [{"id", "requirements", "responsibilities"}, ...], "size": 5}.
+    Trả về {"results": [...]} theo thứ tự jds, mỗi phần tử gồm "id" và kết quả gọn
+    như /search ("total", "hits") hoặc "error" nếu JD đó bị lỗi.
+    """
+    data = request.get_json(silent=True) or {}
+    jds = data.get('jds')
+    if not isinstance(jds, list) or not jds or not all(isinstance(jd, dict) for jd in jds):
+        return jsonify({'error': 'jds must be a non-empty list of objects'}), 400
+    if len(jds) > MAX_BATCH_JDS:
+        return jsonify({'error': f'at most {MAX_BATCH_JDS} jds per request'}), 400
     try:
-        # Lấy tài liệu từ Elasticsearch dựa trên doc_id
-        response = es_handler.get_document(index='cvs', doc_id=doc_id)
-        # Giả sử bạn lưu trữ PDF ở dạng base64 trong Elasticsearch
-        pdf_data = response['_source']['cv_data']
+        size = int(data.get('size', 5))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size must be an integer'}), 400
+    if not 0 < size <= MAX_SEARCH_SIZE:
+        return jsonify({'error': f'size must be between 1 and {MAX_SEARCH_SIZE}'}), 400
 
-        # Giải mã base64 và chuyển thành byte stream
-        pdf_bytes = base64.b64decode(pdf_data)
-        pdf_io = io.BytesIO(pdf_bytes)
+    try:
+        responses = es_handler.search_cvs_by_jds(jds, size=size)
+    except Exception as e:
+        logger.error(f"Error during batch search: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
-        # Trả về tệp PDF dưới dạng file
-        return send_file(pdf_io, mimetype='application/pdf', as_attachment=True, download_name='CV.pdf')
-    
+    results = []
+    for i, (jd, response) in enumerate(zip(jds, responses)):
+        result = {'id': jd.get('id', i)}
+        if 'error' in response:
+            result['error'] = str(response['error'])
+        else:
+            result.update(compact_hits(response))
+            del result['pit_id']
+        results.append(result)
+    return jsonify({'results': results})
+
+@app.route('/jds', methods=['POST'])
+def add_jd():
+    """Lưu JD ({"id"?, "title", "requirements", "responsibilities"}) để dùng cho /search/reverse."""
+    data = request.get_json(silent=True) or {}
+    if not data.get('requirements') and not data.get('responsibilities'):
+        return jsonify({'error': 'requirements or responsibilities is required'}), 400
+    try:
+        jd_id = es_handler.index_jd(data)
+    except NotImplementedError:
+        return jsonify({'error': 'Stored JDs are not supported by this search backend'}), 501
     except Exception as e:
+        logger.error(f"Error indexing JD: {str(e)}")
         return jsonify({'error': str(e)}), 500
+    return jsonify({'id': jd_id}), 201
 
-@app.route('/view_pdf/<doc_id>', methods=['GET'])
-def view_pdf(doc_id):
+@app.route('/search/reverse', methods=['POST'])
+def search_reverse():
+    """Tìm các JD đã lưu phù hợp với một CV: body {"doc_id", "size"}."""
+    data = request.get_json(silent=True) or {}
+    doc_id = data.get('doc_id')
+    if not doc_id:
+        return jsonify({'error': 'doc_id is required'}), 400
+    try:
+        size = int(data.get('size', 5))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size must be an integer'}), 400
+    if not 0 < size <= MAX_SEARCH_SIZE:
+        return jsonify({'error': f'size must be between 1 and {MAX_SEARCH_SIZE}'}), 400
+
+    try:
+        response = es_handler.search_jds_by_cv(str(doc_id), size=size)
+    except NotImplementedError:
+        return jsonify({'error': 'Stored JDs are not supported by this search backend'}), 501
+    except Exception as e:
+        logger.error(f"Error during reverse search: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    if response is None:
+        return jsonify({'error': 'CV not found'}), 404
+    results = compact_hits(response)
+    del results['pit_id']
+    return jsonify(results)
+
+# Kích thước mỗi chunk khi stream file PDF
+PDF_CHUNK_SIZE = 64 * 1024
+
+def open_pdf(doc_id):
+    """Mở file PDF của CV, trả về (file, kích thước, etag) hoặc None nếu không tìm thấy CV."""
+    response = es_handler.get_document(index=es_handler.index_name, doc_id=doc_id, source_includes=PDF_SOURCE_FIELDS)
+    if response is None:
+        return None
+    source = response['_source']
+    if 'cv_sha256' in source:
+        pdf_file = blob_store.open(source['cv_sha256'])
+        size = source.get('cv_size') or os.fstat(pdf_file.fileno()).st_size
+        # Nội dung blob không đổi theo SHA-256 nên dùng luôn làm strong ETag
+        return pdf_file, size, source['cv_sha256']
+    # CV được index trước khi có blob store vẫn lưu PDF dạng base64 trong cv_data
+    data = base64.b64decode(source['cv_data'])
+    return io.BytesIO(data), len(data), None
+
+def send_pdf(doc_id, as_attachment):
+    """
+    Stream file PDF của CV theo từng chunk, hỗ trợ ETag, conditional GET
+    (If-None-Match -> 304) và Range (206) để trình xem PDF tải dần từng trang.
+    """
+    opened = open_pdf(doc_id)
+    if opened is None:
+        return jsonify({'error': 'CV not found'}), 404
+    pdf_file, size, etag = opened
+
+    response = Response(
+        wrap_file(request.environ, pdf_file, buffer_size=PDF_CHUNK_SIZE),
+        mimetype='application/pdf',
+        direct_passthrough=True
+    )
+    response.content_length = size
+    response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline', filename='CV.pdf')
+    if etag is not None:
+        response.set_etag(etag)
+    # Trình duyệt lưu file nhưng kiểm tra lại bằng ETag trước khi dùng
+    response.cache_control.no_cache = True
     try:
-        # Lấy tài liệu từ Elasticsearch dựa trên doc_id
-        response = es_handler.get_document(index='cvs', doc_id=doc_id)
-        # Giả sử bạn lưu trữ PDF ở dạng base64 trong Elasticsearch
-        pdf_data = response['_source']['cv_data']
+        return response.make_conditional(request.environ, accept_ranges=True, complete_length=size)
+    except RequestedRangeNotSatisfiable:
+        response.close()
+        raise
 
-        # Giải mã base64 và chuyển thành byte stream
-        pdf_bytes = base64.b64decode(pdf_data)
-        pdf_io = io.BytesIO(pdf_bytes)
+@app.route('/pdf/<doc_id>', methods=['GET'])
+def get_pdf(doc_id):
+    try:
+        return send_pdf(doc_id, as_attachment=True)
+    except HTTPException as e:
+        return e
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
+@app.route('/view_pdf/<doc_id>', methods=['GET'])
+def view_pdf(doc_id):
+    try:
         # Trả về PDF trực tiếp trong trình duyệt
-        return send_file(pdf_io, mimetype='application/pdf')
-    
+        return send_pdf(doc_id, as_attachment=False)
+    except HTTPException as e:
+        return e
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -120,4 +379,6 @@ def view_pdf(doc_id):
 if __name__ == '__main__':
     # Create Elasticsearch index on startup
     es_handler.create_index()
+    # Tiếp tục xử lý các file còn trong hàng đợi từ lần chạy trước
+    ingest_workers.start()
     app.run(debug=True)
\ No newline at end of file
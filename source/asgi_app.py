@@ -0,0 +1,345 @@
+"""
+App ASGI (Starlette) cho đường phục vụ nhiều request đồng thời: /search, /pdf,
+/view_pdf (và /upload, /metrics, /stats) với cùng API như app.py.
+
+Tìm kiếm và lấy document dùng AsyncElasticsearch, nên một process giữ được hàng
+trăm request đang chờ Elasticsearch mà không cần mỗi request một thread. Parse PDF
+(CPU) chạy trong process pool, các thao tác sync còn lại (reranker, backend local)
+chạy trong thread pool. Các route quản trị (/jobs, /search/batch, /jds,
+/search/reverse) vẫn chỉ có ở app.py. Chạy từ thư mục source:
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 8000
+
+Cần starlette, uvicorn, aiohttp (cho AsyncElasticsearch) và python-multipart (cho /upload).
+"""
+import asyncio
+import base64
+import contextlib
+import logging
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.utils import secure_filename
+from werkzeug.wrappers import Response as WerkzeugResponse
+
+from async_elastic_handler import AsyncElasticHandler
+from blob_store import LocalBlobStore
+from elastic_handler import ElasticHandler, compact_hits
+from metrics import HTTP_REQUEST_SECONDS, REGISTRY
+from pdf_processor import Processor
+from search_api import PDF_SOURCE_FIELDS, next_page, parse_paging, stream_ndjson
+from search_backend import create_search_backend
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html')
+MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request size, như app.py
+# Số process parse PDF (mặc định bằng số CPU)
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', '0')) or None
+
+
+class ThreadedBackend:
+    """Bọc một SearchBackend sync (vd. LocalSearchBackend) để gọi từ app async qua thread pool."""
+
+    def __init__(self, backend):
+        self.handler = backend
+
+    @property
+    def index_name(self) -> str:
+        return self.handler.index_name
+
+    @property
+    def reranker(self):
+        return self.handler.reranker
+
+    async def close(self) -> None:
+        pass
+
+    async def search_cv_by_jd(self, *args, **kwargs):
+        return await run_in_threadpool(self.handler.search_cv_by_jd, *args, **kwargs)
+
+    async def search_cv_by_jd_reranked(self, *args, **kwargs):
+        return await run_in_threadpool(self.handler.search_cv_by_jd_reranked, *args, **kwargs)
+
+    async def open_point_in_time(self, *args, **kwargs):
+        return await run_in_threadpool(self.handler.open_point_in_time, *args, **kwargs)
+
+    async def close_point_in_time(self, *args, **kwargs):
+        return await run_in_threadpool(self.handler.close_point_in_time, *args, **kwargs)
+
+    async def get_document(self, *args, **kwargs):
+        return await run_in_threadpool(self.handler.get_document, *args, **kwargs)
+
+    async def index_cv(self, cv_data):
+        return await run_in_threadpool(self.handler.index_cv, cv_data)
+
+
+es_handler = create_search_backend()
+if os.environ.get('RERANK', '0') == '1':
+    from reranker import DEFAULT_STORE_DIR, Reranker
+    es_handler.reranker = Reranker(store_dir=os.environ.get('RERANK_STORE', DEFAULT_STORE_DIR))
+blob_store = LocalBlobStore()
+processor = Processor(blob_store=blob_store)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Client async và process pool gắn với event loop/process của server nên tạo khi khởi động
+    if isinstance(es_handler, ElasticHandler):
+        app.state.backend = AsyncElasticHandler(es_handler)
+    else:
+        app.state.backend = ThreadedBackend(es_handler)
+    app.state.parse_executor = processor.create_executor(PARSE_WORKERS)
+    try:
+        yield
+    finally:
+        await app.state.backend.close()
+        app.state.parse_executor.shutdown(cancel_futures=True)
+
+
+def error(message, status_code):
+    return JSONResponse({'error': message}, status_code=status_code)
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+def limit_body(request: Request, max_bytes: int) -> Request:
+    """
+    Request đọc body qua receive có đếm byte, raise RequestTooLarge khi vượt max_bytes.
+
+    Kiểm tra Content-Length thôi là chưa đủ: request chunked không có header này.
+    """
+    received = 0
+
+    async def receive():
+        nonlocal received
+        message = await request.receive()
+        if message['type'] == 'http.request':
+            received += len(message.get('body', b''))
+            if received > max_bytes:
+                raise RequestTooLarge()
+        return message
+
+    return Request(request.scope, receive)
+
+
+async def index(request):
+    return FileResponse(TEMPLATE_PATH, media_type='text/html')
+
+
+async def upload_files(request):
+    if int(request.headers.get('content-length') or 0) > MAX_CONTENT_LENGTH:
+        return error('Request too large', 413)
+    try:
+        form = await limit_body(request, MAX_CONTENT_LENGTH).form()
+    except RequestTooLarge:
+        return error('Request too large', 413)
+    files = form.getlist('files[]')
+    if not files:
+        return error('No files provided', 400)
+
+    backend = request.app.state.backend
+    loop = asyncio.get_running_loop()
+    processed_files = []
+    for file in files:
+        if not getattr(file, 'filename', None) or not file.filename.endswith('.pdf'):
+            continue
+        filename = secure_filename(file.filename)
+        pdf_bytes = await file.read()
+        try:
+            # Parse trong process pool để không chặn event loop (và các request tìm kiếm khác)
+            cv_data = await asyncio.wrap_future(
+                processor.submit(request.app.state.parse_executor, pdf_bytes, file_name=filename), loop=loop
+            )
+            if cv_data:
+                doc_id = await backend.index_cv(cv_data)
+                processed_files.append({'filename': filename, 'status': 'success', 'doc_id': doc_id})
+        except Exception as e:
+            # PDF hỏng chỉ làm lỗi file đó, không làm hỏng cả batch
+            logger.error(f"Error processing {filename}: {str(e)}")
+            processed_files.append({'filename': filename, 'status': 'error', 'message': str(e)})
+    await form.close()
+    return JSONResponse({'processed_files': processed_files})
+
+
+async def stats(request):
+    return JSONResponse({'search_cache': es_handler.cache_stats()})
+
+
+async def metrics(request):
+    gauges = {
+        f"search_cache_{key}": (f"Search result cache {key}.", value)
+        for key, value in es_handler.cache_stats().items()
+    }
+    return PlainTextResponse(REGISTRY.render(gauges), media_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+async def search_cvs(request):
+    """Như /search của app.py (from/size, deep paging bằng PIT, rerank, NDJSON)."""
+    try:
+        data = await request.json()
+    except ValueError:
+        return error('Invalid JSON body', 400)
+    if not isinstance(data, dict):
+        return error('JSON body must be an object', 400)
+    requirements = data.get('requirements', '')
+    responsibilities = data.get('responsibilities', '')
+    try:
+        size, from_ = parse_paging(data)
+    except ValueError as e:
+        return error(str(e), 400)
+
+    backend = request.app.state.backend
+    pit_id = data.get('pit_id')
+    search_after = data.get('search_after')
+
+    try:
+        if data.get('rerank') and backend.reranker is not None and pit_id is None and not data.get('deep'):
+            if from_ + size > backend.reranker.window:
+                return error(f'from + size must not exceed {backend.reranker.window} when re-ranking', 400)
+            response = await backend.search_cv_by_jd_reranked(
+                str(requirements), str(responsibilities), size=size, from_=from_
+            )
+        else:
+            if data.get('deep') and pit_id is None:
+                pit_id = await backend.open_point_in_time()
+            response = await backend.search_cv_by_jd(
+                job_requirements=str(requirements),
+                job_responsibilities=str(responsibilities),
+                size=size,
+                from_=from_,
+                search_after=search_after,
+                pit_id=pit_id
+            )
+    except Exception as e:
+        logger.error(f"Error during search: {str(e)}")
+        return error(str(e), 500)
+
+    next_ = next_page(response, size, from_, pit_id)
+    if next_ is None and pit_id is not None:
+        # Trang cuối của deep paging: đóng point-in-time thay vì chờ hết keep_alive
+        try:
+            await backend.close_point_in_time(response.get('pit_id') or pit_id)
+        except Exception as e:
+            logger.warning(f"Error closing point in time: {str(e)}")
+
+    if request.query_params.get('format') == 'ndjson' or \
+            request.headers.get('accept', '').startswith('application/x-ndjson'):
+        return StreamingResponse(stream_ndjson(response, next_), media_type='application/x-ndjson')
+    results = compact_hits(response)
+    results['next'] = next_
+    return JSONResponse(results)
+
+
+async def send_pdf(request, as_attachment):
+    """
+    Trả file PDF của CV với ETag (SHA-256 của blob), If-None-Match -> 304 và Range (206).
+    File được gửi bằng FileResponse (đọc từng chunk trong thread pool); PDF cũ trong
+    cv_data xem send_legacy_pdf.
+    """
+    doc_id = request.path_params['doc_id']
+    backend = request.app.state.backend
+    response = await backend.get_document(index=backend.index_name, doc_id=doc_id,
+                                          source_includes=PDF_SOURCE_FIELDS)
+    if response is None:
+        return error('CV not found', 404)
+    source = response['_source']
+    disposition = 'attachment' if as_attachment else 'inline'
+    headers = {'Cache-Control': 'no-cache'}
+
+    if 'cv_sha256' not in source:
+        # CV được index trước khi có blob store vẫn lưu PDF dạng base64 trong cv_data
+        headers['Content-Disposition'] = f'{disposition}; filename="CV.pdf"'
+        return send_legacy_pdf(request, base64.b64decode(source['cv_data']), headers)
+
+    etag = f'"{source["cv_sha256"]}"'
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and (if_none_match.strip() == '*' or
+                          etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]):
+        return Response(status_code=304, headers=dict(headers, ETag=etag))
+    headers['ETag'] = etag
+    return FileResponse(blob_store.path(source['cv_sha256']), media_type='application/pdf', headers=headers,
+                        filename='CV.pdf', content_disposition_type=disposition)
+
+
+def send_legacy_pdf(request, data: bytes, headers) -> Response:
+    """
+    PDF trong bộ nhớ (cv_data): Range (206/416) và conditional GET theo make_conditional
+    của werkzeug, giống send_pdf của app.py.
+    """
+    environ = {'REQUEST_METHOD': request.method}
+    for name in ('range', 'if-range', 'if-none-match', 'if-modified-since'):
+        if name in request.headers:
+            environ['HTTP_' + name.upper().replace('-', '_')] = request.headers[name]
+    response = WerkzeugResponse(data, mimetype='application/pdf', headers=headers)
+    try:
+        response = response.make_conditional(environ, accept_ranges=True, complete_length=len(data))
+    except RequestedRangeNotSatisfiable:
+        return JSONResponse({'error': 'Requested range not satisfiable'}, status_code=416,
+                            headers={'Content-Range': f'bytes */{len(data)}'})
+    return Response(response.get_data(), status_code=response.status_code, headers=dict(response.headers))
+
+
+async def get_pdf(request):
+    try:
+        return await send_pdf(request, as_attachment=True)
+    except Exception as e:
+        return error(str(e), 500)
+
+
+async def view_pdf(request):
+    try:
+        return await send_pdf(request, as_attachment=False)
+    except Exception as e:
+        return error(str(e), 500)
+
+
+class RequestMetricsMiddleware:
+    """Ghi HTTP_REQUEST_SECONDS theo route (vd. /pdf/{doc_id}), method và status như app.py."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = ['500']
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = str(message['status'])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get('route')
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                         endpoint=route.path if route is not None else 'unmatched',
+                                         method=scope['method'], status=status[0])
+
+
+app = Starlette(
+    routes=[
+        Route('/', index),
+        Route('/upload', upload_files, methods=['POST']),
+        Route('/stats', stats),
+        Route('/metrics', metrics),
+        Route('/search', search_cvs, methods=['POST']),
+        Route('/pdf/{doc_id}', get_pdf),
+        Route('/view_pdf/{doc_id}', view_pdf),
+    ],
+    lifespan=lifespan,
+)
+app.add_middleware(RequestMetricsMiddleware)
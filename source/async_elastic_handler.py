@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from elasticsearch import NotFoundError
+
+try:
+    from .elastic_handler import ElasticHandler
+    from .es_client import create_async_es_client
+    from .metrics import SEARCH_BACKEND_SECONDS
+except ImportError:
+    from elastic_handler import ElasticHandler
+    from es_client import create_async_es_client
+    from metrics import SEARCH_BACKEND_SECONDS
+
+
+class AsyncElasticHandler:
+    """
+    Phiên bản async (AsyncElasticsearch) của các thao tác dùng trong đường phục vụ
+    request: tìm kiếm, lấy document và index một CV.
+
+    Dùng chung cấu hình, truy vấn (search_params), alias và cache kết quả với một
+    ElasticHandler, nên kết quả giống hệt bản sync và cache được dùng chung. Các thao
+    tác quản trị (create_index, reindex, bulk) vẫn dùng ElasticHandler. Phải tạo và
+    đóng (close) trong cùng event loop.
+    """
+
+    def __init__(self, handler: ElasticHandler, client=None):
+        self.handler = handler
+        self.es = client if client is not None else create_async_es_client(handler.settings)
+        self.search_es = self.es.options(request_timeout=handler.settings['search_timeout'])
+        self.index_es = self.es.options(request_timeout=handler.settings['index_timeout'])
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def index_name(self) -> str:
+        return self.handler.index_name
+
+    @property
+    def reranker(self):
+        return self.handler.reranker
+
+    async def close(self) -> None:
+        await self.es.close()
+
+    async def search_cv_by_jd(self, job_requirements: str, job_responsibilities: str, size: int = 5, from_: int = 0,
+                              search_after: Optional[List] = None, pit_id: Optional[str] = None,
+                              keep_alive: str = "1m"):
+        """Giống ElasticHandler.search_cv_by_jd (kể cả cache), không chặn event loop khi chờ Elasticsearch."""
+        cache_key = None
+        if pit_id is None:
+            cache_key = self.handler._search_cache_key(job_requirements, job_responsibilities, size, from_)
+            cached = self.handler.search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        params = self.handler.search_params(job_requirements, job_responsibilities, size, from_,
+                                            search_after, pit_id, keep_alive)
+        with SEARCH_BACKEND_SECONDS.time(backend="elastic_async", operation="search"):
+            response = await self.search_es.search(**params)
+
+        if cache_key is not None:
+            self.handler.search_cache.put(cache_key, response)
+        return response
+
+    async def search_cv_by_jd_reranked(self, job_requirements: str, job_responsibilities: str,
+                                       size: int = 5, from_: int = 0) -> Dict:
+        """Như SearchBackend.search_cv_by_jd_reranked; phần embedding (CPU) chạy trong thread pool."""
+        reranker = self.reranker
+        if reranker is None:
+            raise ValueError("Re-ranking is not enabled for this search backend")
+        response = await self.search_cv_by_jd(
+            job_requirements, job_responsibilities, size=max(reranker.window, from_ + size)
+        )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, lambda: reranker.rerank(response, job_requirements, job_responsibilities, size=size, from_=from_)
+        )
+
+    async def open_point_in_time(self, keep_alive: str = "1m") -> str:
+        with SEARCH_BACKEND_SECONDS.time(backend="elastic_async", operation="open_point_in_time"):
+            response = await self.search_es.open_point_in_time(index=self.index_name, keep_alive=keep_alive)
+        return response['id']
+
+    async def close_point_in_time(self, pit_id: str) -> None:
+        await self.es.close_point_in_time(id=pit_id)
+
+    async def get_document(self, index, doc_id, source_includes: Optional[List[str]] = None):
+        """Như ElasticHandler.get_document: None nếu không tồn tại, lỗi khác được raise."""
+        try:
+            with SEARCH_BACKEND_SECONDS.time(backend="elastic_async", operation="get"):
+                return await self.search_es.get(index=index, id=doc_id, source_includes=source_includes)
+        except NotFoundError:
+            return None
+
+    async def index_cv(self, cv_data: Dict) -> str:
+        """Index một CV qua alias ghi như ElasticHandler.index_cv (bỏ qua nếu cv_id đã tồn tại)."""
+        document_id = cv_data.get('cv_id')
+        if not document_id:
+            raise ValueError("cv_id is required for indexing")
+
+        with SEARCH_BACKEND_SECONDS.time(backend="elastic_async", operation="exists"):
+            exists = await self.index_es.exists(index=self.handler.write_alias, id=document_id)
+        if not exists:
+            with SEARCH_BACKEND_SECONDS.time(backend="elastic_async", operation="index"):
+                response = await self.index_es.index(index=self.handler.write_alias, id=document_id,
+                                                     document=cv_data)
+            document_id = response['_id']
+            self.handler.bump_generation_after_write()
+        else:
+            self.logger.info(f"Document with cv_id {document_id} already exists. Skipping indexing.")
+        if self.reranker is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.handler.embed_cvs, [cv_data])
+        return document_id
@@ -0,0 +1,70 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Tuple
+
+# Cố định theo vị trí package (không theo thư mục hiện tại) để app (chạy trong source/) và
+# CLI ingest (python -m source.ingest từ thư mục gốc) dùng chung một thư mục
+DEFAULT_BLOB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blobs")
+
+
+class BlobStore(ABC):
+    """Lưu trữ file PDF theo địa chỉ nội dung (SHA-256)."""
+
+    @abstractmethod
+    def put(self, data: bytes) -> Tuple[str, int]:
+        """Lưu dữ liệu và trả về (sha256, size)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, sha256: str) -> BinaryIO:
+        """Mở file đã lưu để đọc dạng stream."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def exists(self, sha256: str) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, sha256: str) -> None:
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """Backend mặc định: lưu file trên ổ đĩa local, thư mục con theo tiền tố của hash."""
+
+    def __init__(self, root: str = None):
+        self.root = root or os.environ.get('CV_BLOB_DIR', DEFAULT_BLOB_DIR)
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], f"{sha256}.pdf")
+
+    def put(self, data: bytes) -> Tuple[str, int]:
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self.path(sha256)
+        if not os.path.exists(path):
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            # Ghi ra file tạm rồi đổi tên để không bao giờ đọc phải file ghi dở
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+        return sha256, len(data)
+
+    def open(self, sha256: str) -> BinaryIO:
+        return open(self.path(sha256), 'rb')
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self.path(sha256))
+
+    def delete(self, sha256: str) -> None:
+        try:
+            os.remove(self.path(sha256))
+        except FileNotFoundError:
+            pass
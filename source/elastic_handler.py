@@ -1,94 +1,415 @@
 import logging
-from typing import Dict
-from elasticsearch import Elasticsearch
-import base64
-
-class ElasticHandler:
-    def __init__(self, host: str = "localhost", port: int = 9200, index_name: str = "cvs", scheme: str = "http"):
-        """Initialize Elasticsearch connection and setup index."""
-        self.es = Elasticsearch([{'host': host, 'port': port, 'scheme': scheme}])
-        self.index_name = index_name
-        self.logger = logging.getLogger(__name__)
-        
-    def create_index(self) -> None:
-        """Create index with predefined mapping if it doesn't exist."""
-        settings = {
-            "settings": {
-                "number_of_shards": 1,
-                "number_of_replicas": 1,
-                "analysis": {
-                    "analyzer": {
-                        "cv_analyzer": {
-                            "type": "custom",
-                            "tokenizer": "standard",
-                            "filter": [
-                                "lowercase",
-                                "stop",
-                                "snowball"
-                            ]
-                        }
-                    }
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+from elasticsearch import Elasticsearch, NotFoundError
+from elasticsearch.helpers import streaming_bulk
+
+try:
+    from .es_client import get_es_client, load_es_settings
+    from .metrics import SEARCH_BACKEND_SECONDS
+    from .search_backend import SKILL_IDS_BOOST, SearchBackend
+    from .search_cache import SearchCache
+except ImportError:
+    from es_client import get_es_client, load_es_settings
+    from metrics import SEARCH_BACKEND_SECONDS
+    from search_backend import SKILL_IDS_BOOST, SearchBackend
+    from search_cache import SearchCache
+
+def normalize_query_text(text: str) -> str:
+    """Chuẩn hóa text truy vấn cho cache key: chữ thường, gộp khoảng trắng."""
+    return ' '.join(text.lower().split())
+
+
+def compact_hit(hit: Dict) -> Dict:
+    """Rút gọn một hit của Elasticsearch: chỉ giữ id, điểm, highlight và metadata."""
+    compact = {
+        'id': hit['_id'],
+        'score': hit['_score'],
+        'highlights': hit.get('highlight', {}),
+        'metadata': hit.get('_source', {}).get('metadata', {})
+    }
+    if 'sort' in hit:
+        compact['sort'] = hit['sort']
+    return compact
+
+
+def compact_hits(response) -> Dict:
+    """Chuyển response tìm kiếm sang dạng gọn {total, hits, pit_id} để trả cho client."""
+    return {
+        'total': response['hits']['total']['value'],
+        'hits': [compact_hit(hit) for hit in response['hits']['hits']],
+        'pit_id': response.get('pit_id')
+    }
+
+
+# Phiên bản của INDEX_BODY: tăng khi đổi mapping/settings rồi chạy `python -m source.reindex`
+# để dựng index {index_name}_v{MAPPING_VERSION} mới và chuyển alias sang mà không dừng tìm kiếm.
+MAPPING_VERSION = 1
+
+INDEX_BODY = {
+    "settings": {
+        "number_of_shards": 1,
+        "number_of_replicas": 1,
+        "analysis": {
+            "analyzer": {
+                "cv_analyzer": {
+                    "type": "custom",
+                    "tokenizer": "standard",
+                    "filter": [
+                        "lowercase",
+                        "stop",
+                        "snowball"
+                    ]
                 }
+            }
+        }
+    },
+    "mappings": {
+        "properties": {
+            "cv_id": {
+                "type": "keyword"  # Exact match field
+            },
+            "profile": {
+                "type": "text",
+                "analyzer": "cv_analyzer",
+                "search_analyzer": "cv_analyzer"
+            },
+            "skills": {
+                "type": "text",
+                "analyzer": "cv_analyzer",
+                "search_analyzer": "cv_analyzer"
+            },
+            "experience": {
+                "type": "text",
+                "analyzer": "cv_analyzer",
+                "search_analyzer": "cv_analyzer"
+            },
+            "education": {
+                "type": "text",
+                "analyzer": "cv_analyzer",
+                "search_analyzer": "cv_analyzer"
             },
-            "mappings": {
+            "skill_ids": {
+                "type": "keyword"  # Id kỹ năng đã chuẩn hóa theo skill_taxonomy.json
+            },
+            "cv_sha256": {
+                "type": "keyword"  # SHA-256 của file PDF trong blob store
+            },
+            "cv_size": {
+                "type": "long"
+            },
+            "contact": {
+                "type": "text",
+            },
+            "cv_data": {
+                "type": "binary"  # PDF base64 của CV index trước khi có blob store, không đánh chỉ mục
+            },
+            "metadata": {
                 "properties": {
-                    "cv_id": {
-                        "type": "keyword"  # Exact match field
-                    },
-                    "profile": {
-                        "type": "text",
-                        "analyzer": "cv_analyzer",
-                        "search_analyzer": "cv_analyzer"
-                    },
-                    "skills": {
-                        "type": "text",
-                        "analyzer": "cv_analyzer",
-                        "search_analyzer": "cv_analyzer"
-                    },
-                    "experience": {
-                        "type": "text",
-                        "analyzer": "cv_analyzer",
-                        "search_analyzer": "cv_analyzer"
-                    },
-                    "education": {
-                        "type": "text",
-                        "analyzer": "cv_analyzer",
-                        "search_analyzer": "cv_analyzer"
-                    },
-                    "cv_data":{
-                        "type" : "text"
-                    },
-                    "contact": {
-                        "type": "text",
-                    },
-                    "metadata": {
-                        "properties": {
-                            "last_updated": {"type": "date"},
-                            "file_name": {"type": "keyword"},
-                            "language": {"type": "keyword"}
-                        }
-                    }
+                    "last_updated": {"type": "date"},
+                    "file_name": {"type": "keyword"},
+                    "language": {"type": "keyword"}
+                }
+            }
+        }
+    }
+}
+
+
+# Sau khi ghi một CV, generation được tăng lần nữa sau khoảng này (giây): refresh_interval
+# mặc định của index là 1s, cộng thêm thời gian refresh
+REFRESH_DELAY = 2.0
+
+
+# Index lưu JD cho chế độ tìm ngược (CV -> JD phù hợp), dùng cùng analyzer với index CV
+JD_INDEX_BODY = {
+    "settings": INDEX_BODY["settings"],
+    "mappings": {
+        "properties": {
+            "requirements": {
+                "type": "text",
+                "analyzer": "cv_analyzer",
+                "search_analyzer": "cv_analyzer"
+            },
+            "responsibilities": {
+                "type": "text",
+                "analyzer": "cv_analyzer",
+                "search_analyzer": "cv_analyzer"
+            },
+            "skill_ids": {
+                "type": "keyword"
+            },
+            "metadata": {
+                "properties": {
+                    "title": {"type": "text", "fields": {"keyword": {"type": "keyword"}}},
+                    "created": {"type": "date"}
                 }
             }
         }
+    }
+}
+
+
+class ElasticHandler(SearchBackend):
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, index_name: str = "cvs",
+                 scheme: Optional[str] = None, cache_size: int = 256, cache_ttl: float = 300,
+                 client: Optional[Elasticsearch] = None, config_path: Optional[str] = None,
+                 jd_index_name: str = "jds"):
+        """
+        Initialize Elasticsearch connection and setup index.
+
+        Cấu hình kết nối (pool, timeout, retry, sniffing) đọc bằng load_es_settings:
+        file ES_CONFIG và biến môi trường ES_*, host/port/scheme truyền vào được ưu tiên.
+        Các handler cùng cấu hình trong một process dùng chung một client (get_es_client).
+        """
+        super().__init__(index_name=index_name)
+        # index_name là alias đọc; mọi thao tác ghi đi qua alias ghi (xem create_index, reindex)
+        self.write_alias = f"{index_name}_write"
+        self.jd_index_name = jd_index_name
+        self.settings = load_es_settings(config_path, host=host, port=port, scheme=scheme)
+        self.es = client if client is not None else get_es_client(self.settings)
+        # Timeout riêng cho từng loại thao tác (client dùng chung pool kết nối với self.es)
+        self.search_es = self.es.options(request_timeout=self.settings['search_timeout'])
+        self.index_es = self.es.options(request_timeout=self.settings['index_timeout'])
+        self.bulk_es = self.es.options(request_timeout=self.settings['bulk_timeout'])
+        self.logger = logging.getLogger(__name__)
+        # Cache dùng generation (tăng sau mỗi lần index) trong key để bỏ kết quả cũ.
+        # Thay đổi từ process khác không được theo dõi, khi đó dựa vào TTL của cache.
+        self.search_cache = SearchCache(maxsize=cache_size, ttl=cache_ttl)
+        # True trong bulk_load (refresh đang tắt)
+        self._bulk_loading = False
+        self.refresh_delay = REFRESH_DELAY
+
+    def cache_stats(self) -> Dict:
+        stats = self.search_cache.stats()
+        stats['generation'] = self.generation
+        return stats
+        
+    def create_index(self) -> None:
+        """
+        Tạo index {index_name}_v{MAPPING_VERSION} kèm alias đọc ({index_name}) và alias ghi
+        ({index_name}_write) nếu chưa có.
 
+        Index cũ (index thật tên {index_name}, chưa dùng alias) vẫn được dùng, chỉ thêm
+        alias ghi; chạy reindex() để chuyển sang index có phiên bản.
+        """
         try:
-            # Kiểm tra nếu index chưa tồn tại
-            if not self.es.indices.exists(index=self.index_name):
-                self.es.indices.create(index=self.index_name, body=settings)
-                self.logger.info(f"Created index {self.index_name}")
+            if self.es.indices.exists_alias(name=self.index_name):
+                version = self.current_version()
+                self.logger.info(f"Index alias {self.index_name} -> {self.current_index()} (mapping v{version})")
+                if version < MAPPING_VERSION:
+                    self.logger.warning(f"Index {self.index_name} uses mapping v{version}, current is "
+                                        f"v{MAPPING_VERSION}; run `python -m source.reindex` to migrate")
+            elif self.es.indices.exists(index=self.index_name):
+                self.logger.warning(f"Index {self.index_name} is a legacy index without aliases; "
+                                    f"run `python -m source.reindex` to migrate to mapping v{MAPPING_VERSION}")
+                if not self.es.indices.exists_alias(name=self.write_alias):
+                    self.es.indices.put_alias(index=self.index_name, name=self.write_alias)
             else:
-                # Kiểm tra index đã tồn tại
-                self.logger.info(f"Index {self.index_name} already exists. Proceeding to check settings and mappings.")
-                
-                # Kiểm tra sự khác biệt giữa mapping và settings đã tạo (nếu cần thiết)
-                current_mapping = self.es.indices.get_mapping(index=self.index_name)
-                # Có thể thêm code kiểm tra sự thay đổi giữa current_mapping và settings ở đây.
+                new_index = self.versioned_index(MAPPING_VERSION)
+                body = dict(INDEX_BODY, aliases={
+                    self.index_name: {},
+                    self.write_alias: {"is_write_index": True}
+                })
+                self.es.indices.create(index=new_index, body=body)
+                self.logger.info(f"Created index {new_index} with aliases {self.index_name}, {self.write_alias}")
+
+            if not self.es.indices.exists(index=self.jd_index_name):
+                self.es.indices.create(index=self.jd_index_name, body=JD_INDEX_BODY)
+                self.logger.info(f"Created index {self.jd_index_name}")
 
         except Exception as e:
             self.logger.error(f"Error creating index {self.index_name}: {str(e)}")
             raise  # Để lỗi được phát hiện và xử lý bởi các phần khác
-    
+
+    def versioned_index(self, version: int) -> str:
+        return f"{self.index_name}_v{version}"
+
+    def current_index(self) -> str:
+        """Tên index thật mà alias đọc đang trỏ tới (hoặc chính index_name với index cũ)."""
+        if self.es.indices.exists_alias(name=self.index_name):
+            return next(iter(self.es.indices.get_alias(name=self.index_name).body))
+        return self.index_name
+
+    def current_version(self) -> int:
+        """Phiên bản mapping của index hiện tại (0 với index cũ không có hậu tố _vN)."""
+        prefix = f"{self.index_name}_v"
+        current = self.current_index()
+        return int(current[len(prefix):]) if current.startswith(prefix) else 0
+
+    def reindex(self, version: int = MAPPING_VERSION, poll_interval: float = 5.0,
+                delete_old: bool = False) -> str:
+        """
+        Dựng index {index_name}_v{version} với INDEX_BODY hiện tại từ index đang dùng, không dừng tìm kiếm.
+
+        1. Tạo index mới (tắt refresh và replica trong lúc copy).
+        2. Chuyển alias ghi sang index mới: CV upload trong lúc reindex được ghi vào index mới.
+        3. Copy dữ liệu bằng _reindex (op_type create nên không ghi đè CV mới), chạy nền
+           và theo dõi qua tasks API.
+        4. Chuyển alias đọc sang index mới trong một lần update_aliases (atomic). Index cũ
+           không dùng alias (tên trùng alias) bị xóa trong cùng thao tác.
+
+        CV upload trong lúc reindex chỉ tìm thấy được sau bước 4. Index cũ có phiên bản
+        được giữ lại để quay về nếu cần, trừ khi delete_old=True. Nếu bước 2-4 lỗi (hoặc
+        bị dừng), alias ghi được trả về index cũ và index mới bị xóa (_rollback_reindex).
+
+        Returns:
+            Tên index mới.
+        """
+        old_index = self.current_index()
+        new_index = self.versioned_index(version)
+        if new_index == old_index:
+            raise ValueError(f"{self.index_name} already points to {new_index}")
+        legacy = old_index == self.index_name
+
+        self.logger.info(f"Reindexing {old_index} -> {new_index}")
+        body = dict(INDEX_BODY)
+        body["settings"] = dict(INDEX_BODY["settings"], refresh_interval="-1", number_of_replicas=0)
+        self.es.indices.create(index=new_index, body=body)
+
+        task = None
+        try:
+            # Alias ghi chuyển sang index mới trước khi copy
+            self._move_write_alias(old_index, new_index)
+
+            task = self.es.reindex(
+                source={"index": old_index},
+                dest={"index": new_index, "op_type": "create"},
+                conflicts="proceed",
+                wait_for_completion=False
+            )["task"]
+            self._wait_for_task(task, f"Reindex {old_index} -> {new_index}", poll_interval)
+
+            self.es.indices.put_settings(index=new_index, settings={
+                "index": {
+                    "refresh_interval": None,
+                    "number_of_replicas": INDEX_BODY["settings"]["number_of_replicas"]
+                }
+            })
+            self.es.indices.refresh(index=new_index)
+
+            # Chuyển alias đọc trong một thao tác để tìm kiếm không bị gián đoạn
+            if legacy:
+                actions = [
+                    {"remove_index": {"index": old_index}},
+                    {"add": {"index": new_index, "alias": self.index_name}}
+                ]
+            else:
+                actions = [
+                    {"remove": {"index": old_index, "alias": self.index_name}},
+                    {"add": {"index": new_index, "alias": self.index_name}}
+                ]
+            self.es.indices.update_aliases(actions=actions)
+        except BaseException:
+            # Kể cả KeyboardInterrupt: không để alias ghi trỏ vào index mà alias đọc không thấy
+            self._rollback_reindex(old_index, new_index, task, poll_interval)
+            raise
+
+        if delete_old and not legacy:
+            self.es.indices.delete(index=old_index)
+        self.bump_generation()
+        self.logger.info(f"Alias {self.index_name} now points to {new_index}")
+        return new_index
+
+    def _move_write_alias(self, from_index: str, to_index: str) -> None:
+        actions = [{"add": {"index": to_index, "alias": self.write_alias, "is_write_index": True}}]
+        if self.es.indices.exists_alias(index=from_index, name=self.write_alias):
+            actions.insert(0, {"remove": {"index": from_index, "alias": self.write_alias}})
+        self.es.indices.update_aliases(actions=actions)
+
+    def _wait_for_task(self, task: str, label: str, poll_interval: float) -> Dict:
+        """Chờ task _reindex chạy nền kết thúc, RuntimeError nếu có document lỗi."""
+        while True:
+            status = self.es.tasks.get(task_id=task)
+            progress = status["task"]["status"]
+            self.logger.info(f"{label}: {progress.get('created', 0)} created, "
+                             f"{progress.get('version_conflicts', 0)} already present / {progress.get('total', 0)}")
+            if status.get("completed"):
+                break
+            time.sleep(poll_interval)
+        failures = status.get("response", {}).get("failures") or status.get("error")
+        if failures:
+            raise RuntimeError(f"{label} failed: {failures}")
+        return status
+
+    def _rollback_reindex(self, old_index: str, new_index: str, task: Optional[str], poll_interval: float) -> None:
+        """
+        Quay về trạng thái trước reindex: dừng task copy, trả alias ghi về index cũ, copy
+        ngược các CV được upload vào index mới trong lúc reindex rồi xóa index mới.
+
+        Nếu không copy ngược được, index mới được giữ lại (để không mất CV) và ghi log lỗi.
+        """
+        self.logger.error(f"Reindex {old_index} -> {new_index} failed, rolling back")
+        if task is not None:
+            try:
+                self.es.tasks.cancel(task_id=task)
+            except Exception as e:
+                self.logger.warning(f"Could not cancel reindex task {task}: {e}")
+        try:
+            self._move_write_alias(new_index, old_index)
+            # CV đã có ở index cũ bị bỏ qua (op_type create), chỉ CV mới được copy
+            task = self.es.reindex(
+                source={"index": new_index},
+                dest={"index": old_index, "op_type": "create"},
+                conflicts="proceed",
+                refresh=True,
+                wait_for_completion=False
+            )["task"]
+            self._wait_for_task(task, f"Rollback {new_index} -> {old_index}", poll_interval)
+            self.es.indices.delete(index=new_index)
+        except Exception as e:
+            self.logger.error(f"Rollback of {new_index} incomplete, index kept for manual recovery: {e}")
+            return
+        self.bump_generation()
+        self.logger.info(f"Rolled back: {self.write_alias} points to {old_index}, {new_index} deleted")
+
+    @contextmanager
+    def bulk_load(self) -> Iterator[None]:
+        """
+        Tắt refresh và replica của index trong khối with để nạp dữ liệu lớn nhanh hơn,
+        sau đó khôi phục giá trị cũ và refresh để dữ liệu mới tìm kiếm được ngay.
+
+        Nếu lần chạy trước bị dừng đột ngột (refresh_interval vẫn là -1), refresh_interval
+        được trả về mặc định của Elasticsearch.
+        """
+        current = self.es.indices.get_settings(index=self.write_alias, flat_settings=True)
+        index_settings = next(iter(current.body.values()))['settings']
+        refresh_interval = index_settings.get('index.refresh_interval')
+        if refresh_interval == '-1':
+            refresh_interval = None
+        replicas = index_settings.get('index.number_of_replicas')
+        self.logger.info(f"Bulk load on {self.write_alias}: refresh_interval -1, replicas 0 "
+                         f"(will restore refresh_interval={refresh_interval}, replicas={replicas})")
+        self.es.indices.put_settings(index=self.write_alias, settings={
+            "index": {"refresh_interval": "-1", "number_of_replicas": 0}
+        })
+        self._bulk_loading = True
+        try:
+            yield
+        finally:
+            self._bulk_loading = False
+            self.es.indices.put_settings(index=self.write_alias, settings={
+                "index": {"refresh_interval": refresh_interval, "number_of_replicas": replicas}
+            })
+            self.es.indices.refresh(index=self.write_alias)
+            self.bump_generation()
+            self.flush()
+
+    def bump_generation_after_write(self) -> None:
+        """
+        Vô hiệu hóa cache sau khi index một CV mà không chờ refresh (refresh="wait_for"
+        bị giữ tới 30s khi refresh đang tắt trong bulk_load/reindex): tăng generation ngay
+        và thêm một lần sau refresh_delay, để kết quả được cache trước khi CV tìm kiếm
+        được cũng bị bỏ.
+        """
+        self.bump_generation()
+        timer = threading.Timer(self.refresh_delay, self.bump_generation)
+        timer.daemon = True
+        timer.start()
+
     def index_cv(self, cv_data: Dict) -> str:
         """Index a single CV document using cv_id as the document id."""
         try:
@@ -99,31 +420,136 @@ class ElasticHandler:
                 raise ValueError("cv_id is required for indexing")
             
             # Kiểm tra xem tài liệu đã tồn tại chưa
-            if self.es.exists(index=self.index_name, id=document_id):
+            with SEARCH_BACKEND_SECONDS.time(backend="elastic", operation="exists"):
+                exists = self.index_es.exists(index=self.write_alias, id=document_id)
+            if exists:
                 self.logger.info(f"Document with cv_id {document_id} already exists. Skipping indexing.")
+                self.embed_cvs([cv_data])
                 return document_id  # Hoặc bạn có thể xóa tài liệu cũ và index lại nếu cần
             
-            # Debug: log the data structure before sending to Elasticsearch
-            self.logger.info(f"Indexing CV data with cv_id {document_id}: {cv_data}")
-            
-            response = self.es.index(index=self.index_name, id=document_id, document=cv_data)
+            # Không log toàn bộ CV (rất lớn), chỉ id và các trường có dữ liệu
+            self.logger.debug(f"Indexing CV {document_id} (fields: {sorted(k for k, v in cv_data.items() if v)})")
+
+            with SEARCH_BACKEND_SECONDS.time(backend="elastic", operation="index"):
+                response = self.index_es.index(index=self.write_alias, id=document_id, document=cv_data)
+            self.bump_generation_after_write()
+            self.embed_cvs([cv_data])
             return response['_id']
         except Exception as e:
             self.logger.error(f"Error indexing document: {str(e)}")
             raise
     
 
-    def search_cv_by_jd(self, job_requirements: str,job_responsibilities : str, size: int = 5) :
+    def index_cvs(self, cvs: Iterable[Dict], chunk_size: int = 500,
+                  max_chunk_bytes: int = 10 * 1024 * 1024, max_retries: int = 3,
+                  initial_backoff: float = 2, max_backoff: float = 60) -> Dict:
         """
-        Tìm kiếm CV dựa trên yêu cầu công việc và trách nhiệm công việc, có hỗ trợ fuzzy matching
-        
+        Index nhiều CV cùng lúc bằng bulk API (streaming_bulk).
+
+        Mỗi CV được gửi với op_type=create nên việc bỏ qua CV đã tồn tại được
+        Elasticsearch xử lý (lỗi 409), không cần gọi es.exists cho từng CV.
+
         Args:
-            es_client: Elasticsearch client
-            index_name: Tên index chứa CV
-            job_requirements: Các kỹ năng yêu cầu từ JD
-            job_responsibilities: Các trách nhiệm công việc từ JD
-            size: Số lượng kết quả trả về
+            cvs: Iterable các CV (dict có cv_id), có thể là generator
+            chunk_size: Số document tối đa trong một request _bulk
+            max_chunk_bytes: Kích thước tối đa (bytes) của một request _bulk
+            max_retries: Số lần thử lại khi bị từ chối với mã 429
+            initial_backoff: Thời gian chờ (giây) trước lần thử lại đầu tiên, nhân đôi sau mỗi lần
+            max_backoff: Thời gian chờ tối đa (giây) giữa các lần thử lại
+
+        Returns:
+            Dict gồm danh sách id đã index ("indexed"), id đã tồn tại ("skipped")
+            và lỗi của từng document ("errors").
         """
+        def actions():
+            for cv_data in cvs:
+                document_id = cv_data.get('cv_id')
+                if not document_id:
+                    self.logger.error("cv_id is missing in the provided CV data")
+                    summary['errors'].append({'id': None, 'status': None, 'error': 'cv_id is required for indexing'})
+                    continue
+                if self.reranker is not None:
+                    pending[document_id] = cv_data
+                yield {
+                    '_op_type': 'create',
+                    '_index': self.write_alias,
+                    '_id': document_id,
+                    '_source': cv_data
+                }
+
+        summary = {'indexed': [], 'skipped': [], 'errors': []}
+        # CV đã gửi nhưng chưa có kết quả, chỉ giữ khi cần tính embedding cho reranker
+        pending = {}
+        to_embed = []
+        started = time.perf_counter()
+        for ok, item in streaming_bulk(
+            self.bulk_es,
+            actions(),
+            chunk_size=chunk_size,
+            max_chunk_bytes=max_chunk_bytes,
+            raise_on_error=False,
+            raise_on_exception=False,
+            max_retries=max_retries,
+            initial_backoff=initial_backoff,
+            max_backoff=max_backoff
+        ):
+            result = item.get('create', {})
+            document_id = result.get('_id')
+            cv_data = pending.pop(document_id, None)
+            if cv_data is not None and (ok or result.get('status') == 409):
+                to_embed.append(cv_data)
+                if len(to_embed) >= chunk_size:
+                    self.embed_cvs(to_embed)
+                    to_embed = []
+            if ok:
+                summary['indexed'].append(document_id)
+            elif result.get('status') == 409:
+                # Tài liệu đã tồn tại
+                summary['skipped'].append(document_id)
+            else:
+                error = result.get('error')
+                self.logger.error(f"Error indexing document {document_id}: {error}")
+                summary['errors'].append({'id': document_id, 'status': result.get('status'), 'error': str(error)})
+
+        SEARCH_BACKEND_SECONDS.observe(time.perf_counter() - started, backend="elastic", operation="bulk")
+
+        self.embed_cvs(to_embed)
+        # Trong bulk_load refresh đang tắt; bulk_load tự refresh và tăng generation khi kết thúc
+        if summary['indexed'] and not self._bulk_loading:
+            # Refresh trước khi tăng generation để không cache kết quả chưa có các CV này
+            self.index_es.indices.refresh(index=self.write_alias)
+            self.bump_generation()
+        self.logger.info(f"Bulk indexed {len(summary['indexed'])} CVs, skipped {len(summary['skipped'])}, "
+                         f"{len(summary['errors'])} errors")
+        return summary
+
+    def open_point_in_time(self, keep_alive: str = "1m") -> str:
+        """Mở point-in-time trên index để phân trang sâu bằng search_after."""
+        with SEARCH_BACKEND_SECONDS.time(backend="elastic", operation="open_point_in_time"):
+            return self.search_es.open_point_in_time(index=self.index_name, keep_alive=keep_alive)['id']
+
+    def close_point_in_time(self, pit_id: str) -> None:
+        self.es.close_point_in_time(id=pit_id)
+
+    def _search_cache_key(self, job_requirements: str, job_responsibilities: str, size: int, from_: int) -> tuple:
+        return (
+            self.generation,
+            normalize_query_text(job_requirements),
+            normalize_query_text(job_responsibilities),
+            size,
+            from_
+        )
+
+    def build_jd_search(self, job_requirements: str, job_responsibilities: str, size: int = 5) -> Dict:
+        """Body tìm kiếm CV theo JD (query, highlight, size, _source), dùng chung cho search và msearch."""
+        fuzzy = {}
+        if self.fuzzy_matching:
+            fuzzy = {
+                "fuzziness": "AUTO",
+                "prefix_length": 2,  # Số ký tự đầu tiên phải khớp chính xác
+                "max_expansions": 50,  # Số lượng từ biến thể tối đa cho mỗi term
+                "fuzzy_transpositions": True  # Cho phép hoán đổi 2 ký tự liền kề
+            }
         query = {
             "bool": {
                 "should": [
@@ -138,10 +564,7 @@ class ElasticHandler:
                             "type": "best_fields",
                             "operator": "or",
                             "minimum_should_match": "70%",
-                            "fuzziness": "AUTO",
-                            "prefix_length": 2,  # Số ký tự đầu tiên phải khớp chính xác
-                            "max_expansions": 50,  # Số lượng từ biến thể tối đa cho mỗi term
-                            "fuzzy_transpositions": True  # Cho phép hoán đổi 2 ký tự liền kề
+                            **fuzzy
                         }
                     },
                     {
@@ -155,10 +578,7 @@ class ElasticHandler:
                             "type": "best_fields",
                             "operator": "or",
                             "minimum_should_match": "60%",
-                            "fuzziness": "AUTO",
-                            "prefix_length": 2,
-                            "max_expansions": 50,
-                            "fuzzy_transpositions": True
+                            **fuzzy
                         }
                     }
                 ],
@@ -166,41 +586,22 @@ class ElasticHandler:
             }
         }
 
-        # Thêm synonyms query để bắt các từ đồng nghĩa và viết tắt phổ biến
-        synonyms_query = {
-            "bool": {
-                "should": [
-                    {
-                        "match": {
-                            "skills": {
-                                "query": job_requirements,
-                                "fuzziness": "AUTO",
-                                "prefix_length": 2,
-                                "operator": "or"
-                            }
-                        }
-                    },
-                    {
-                        "match": {
-                            "experience": {
-                                "query": job_responsibilities,
-                                "fuzziness": "AUTO",
-                                "prefix_length": 2,
-                                "operator": "or"
-                            }
-                        }
-                    }
-                ]
-            }
-        }
+        # Kỹ năng trong JD được chuẩn hóa về id của taxonomy và so khớp chính xác với
+        # trường skill_ids (đã tính lúc index), thay cho việc lặp lại fuzzy match
+        should = [query]
+        jd_skill_ids = self.skill_matcher.match(f"{job_requirements} {job_responsibilities}")
+        if jd_skill_ids:
+            should.append({
+                "terms": {
+                    "skill_ids": jd_skill_ids,
+                    "boost": SKILL_IDS_BOOST
+                }
+            })
 
         # Kết hợp queries
         final_query = {
             "bool": {
-                "should": [
-                    query,
-                    synonyms_query
-                ],
+                "should": should,
                 "minimum_should_match": 1
             }
         }
@@ -229,20 +630,154 @@ class ElasticHandler:
             }
         }
 
-        response = self.es.search(
-            index=self.index_name,
-            query=final_query,
-            highlight=highlight,
-            size=size,
-            _source=["cv_id", "skills", "experience", "profile","cv_data", "metadata"]
-        )
+        # Chỉ lấy các trường nhỏ; highlight vẫn được tính từ _source đầy đủ phía server
+        return {
+            "query": final_query,
+            "highlight": highlight,
+            "size": size,
+            "_source": ["cv_id", "metadata"]
+        }
 
+    def search_params(self, job_requirements: str, job_responsibilities: str, size: int = 5, from_: int = 0,
+                      search_after: Optional[List] = None, pit_id: Optional[str] = None,
+                      keep_alive: str = "1m") -> Dict:
+        """Tham số của search() cho search_cv_by_jd (dùng chung với AsyncElasticHandler)."""
+        params = self.build_jd_search(job_requirements, job_responsibilities, size)
+        if pit_id is None:
+            params["index"] = self.index_name
+            params["from_"] = from_
+        else:
+            params["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+            params["sort"] = [{"_score": "desc"}, {"_shard_doc": "asc"}]
+            if search_after is not None:
+                params["search_after"] = search_after
+        return params
+
+    def search_cv_by_jd(self, job_requirements: str,job_responsibilities : str, size: int = 5, from_: int = 0,
+                        search_after: Optional[List] = None, pit_id: Optional[str] = None, keep_alive: str = "1m") :
+        """
+        Tìm kiếm CV dựa trên yêu cầu công việc và trách nhiệm công việc, có hỗ trợ fuzzy matching
+        
+        Args:
+            job_requirements: Các kỹ năng yêu cầu từ JD
+            job_responsibilities: Các trách nhiệm công việc từ JD
+            size: Số lượng kết quả trả về
+            from_: Vị trí bắt đầu (phân trang from/size, tối đa index.max_result_window)
+            search_after: Giá trị sort của hit cuối trang trước (phân trang sâu, cần pit_id)
+            pit_id: Point-in-time (xem open_point_in_time); khi có pit_id kết quả được sort
+                theo _score rồi _shard_doc và mỗi hit có giá trị sort cho trang kế tiếp
+            keep_alive: Thời gian giữ point-in-time sau request này
+
+        Kết quả phân trang from/size được cache theo (generation, requirements,
+        responsibilities, size, from_) đã chuẩn hóa; truy vấn dùng PIT không được cache.
+        """
+        cache_key = None
+        if pit_id is None:
+            cache_key = self._search_cache_key(job_requirements, job_responsibilities, size, from_)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        params = self.search_params(job_requirements, job_responsibilities, size, from_,
+                                    search_after, pit_id, keep_alive)
+        with SEARCH_BACKEND_SECONDS.time(backend="elastic", operation="search"):
+            response = self.search_es.search(**params)
+
+        if cache_key is not None:
+            self.search_cache.put(cache_key, response)
         return response
     
-    def get_document(self, index, doc_id):
+    def search_cvs_by_jds(self, jds: List[Dict], size: int = 5) -> List[Dict]:
+        """
+        Tìm CV cho nhiều JD bằng một request _msearch (cùng truy vấn với search_cv_by_jd).
+
+        JD đã có trong cache không được gửi lại. Kết quả theo thứ tự jds; JD bị lỗi
+        trả về {"error": ...} thay vì làm hỏng cả batch.
+        """
+        results: List[Optional[Dict]] = [None] * len(jds)
+        searches = []
+        pending = []
+        for i, jd in enumerate(jds):
+            job_requirements = str(jd.get('requirements', ''))
+            job_responsibilities = str(jd.get('responsibilities', ''))
+            cache_key = self._search_cache_key(job_requirements, job_responsibilities, size, 0)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                results[i] = cached
+                continue
+            searches.append({"index": self.index_name})
+            searches.append(self.build_jd_search(job_requirements, job_responsibilities, size))
+            pending.append((i, cache_key))
+
+        if searches:
+            with SEARCH_BACKEND_SECONDS.time(backend="elastic", operation="msearch"):
+                response = self.search_es.msearch(searches=searches)
+            for (i, cache_key), item in zip(pending, response['responses']):
+                if 'error' in item:
+                    results[i] = {'error': item['error']}
+                else:
+                    self.search_cache.put(cache_key, item)
+                    results[i] = item
+        return results
+
+    def index_jd(self, jd: Dict) -> str:
+        """Lưu JD ({"id"?, "title", "requirements", "responsibilities"}) vào index JD, trả về id."""
+        job_requirements = str(jd.get('requirements', ''))
+        job_responsibilities = str(jd.get('responsibilities', ''))
+        document = {
+            "requirements": job_requirements,
+            "responsibilities": job_responsibilities,
+            "skill_ids": self.skill_matcher.match(f"{job_requirements} {job_responsibilities}"),
+            "metadata": {
+                "title": str(jd.get('title', '')),
+                "created": datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+            }
+        }
+        with SEARCH_BACKEND_SECONDS.time(backend="elastic", operation="index_jd"):
+            response = self.index_es.index(index=self.jd_index_name, id=jd.get('id'), document=document)
+        return response['_id']
+
+    def search_jds_by_cv(self, doc_id: str, size: int = 5):
+        """
+        Tìm ngược các JD phù hợp với một CV bằng more_like_this.
+
+        Skills của CV được so với requirements, experience và profile với responsibilities
+        (giống boost của search_cv_by_jd), cộng điểm khi trùng skill_ids. Trả về None nếu
+        không có CV, kết quả rỗng nếu CV không có nội dung nào để so.
+        """
+        cv = self.get_document(self.index_name, doc_id,
+                               source_includes=["skills", "experience", "profile", "skill_ids"])
+        if cv is None:
+            return None
+        source = cv['_source']
+        # Index JD nhỏ: không loại term theo tần suất như mặc định của more_like_this
+        like_options = {"min_term_freq": 1, "min_doc_freq": 1, "max_query_terms": 50}
+        likes = [
+            ("requirements", source.get("skills") or "", 3),
+            ("responsibilities", f"{source.get('experience') or ''} {source.get('profile') or ''}", 2),
+        ]
+        # more_like_this với like rỗng bị Elasticsearch từ chối, bỏ các trường CV không có
+        should = [
+            {"more_like_this": dict(like_options, fields=[field], like=like.strip(), boost=boost)}
+            for field, like, boost in likes if like.strip()
+        ]
+        if source.get("skill_ids"):
+            should.append({"terms": {"skill_ids": source["skill_ids"], "boost": SKILL_IDS_BOOST}})
+        if not should:
+            return {"hits": {"total": {"value": 0, "relation": "eq"}, "max_score": None, "hits": []}}
+
+        with SEARCH_BACKEND_SECONDS.time(backend="elastic", operation="search_jds"):
+            return self.search_es.search(
+                index=self.jd_index_name,
+                query={"bool": {"should": should, "minimum_should_match": 1}},
+                size=size,
+                _source=["metadata"]
+            )
+
+    def get_document(self, index, doc_id, source_includes: Optional[List[str]] = None):
+        """Lấy một document, None nếu không tồn tại; lỗi khác (mất kết nối, timeout...) được raise."""
         try:
-            response = self.es.get(index=index, id=doc_id)
-            return response
-        except Exception as e:
-            print("Error getting document:", e)
-            return None
\ No newline at end of file
+            with SEARCH_BACKEND_SECONDS.time(backend="elastic", operation="get"):
+                return self.search_es.get(index=index, id=doc_id, source_includes=source_includes)
+        except NotFoundError:
+            return None
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+from elasticsearch import Elasticsearch
+
+logger = logging.getLogger(__name__)
+
+# Cấu hình mặc định của client Elasticsearch. Timeout tính bằng giây.
+DEFAULT_ES_SETTINGS = {
+    'host': 'localhost',
+    'port': 9200,
+    'scheme': 'http',
+    # Số kết nối HTTP tối đa tới mỗi node; request vượt quá phải chờ kết nối rảnh
+    'connections_per_node': 50,
+    # Timeout mặc định và timeout riêng cho từng loại thao tác
+    'request_timeout': 10.0,
+    'search_timeout': 10.0,
+    'index_timeout': 30.0,
+    'bulk_timeout': 120.0,
+    # Thử lại trên node khác khi lỗi kết nối, timeout (nếu bật) hoặc mã 429/502/503/504
+    'max_retries': 3,
+    'retry_on_timeout': True,
+    # Sniffing: lấy danh sách node từ cluster (tắt mặc định, không dùng được sau proxy/load balancer)
+    'sniff_on_start': False,
+    'sniff_on_node_failure': False,
+    'sniff_timeout': 1.0,
+    'min_delay_between_sniffing': 60.0,
+}
+
+# Tên biến môi trường cho từng khóa cấu hình (vd. ES_CONNECTIONS_PER_NODE, ES_SEARCH_TIMEOUT)
+ENV_PREFIX = 'ES_'
+
+# Các khóa được truyền thẳng vào Elasticsearch(...)
+_CLIENT_OPTIONS = (
+    'connections_per_node', 'request_timeout', 'max_retries', 'retry_on_timeout',
+    'sniff_on_start', 'sniff_on_node_failure', 'sniff_timeout', 'min_delay_between_sniffing'
+)
+
+# Client dùng chung trong process, theo (pid, cấu hình)
+_clients: Dict[tuple, Elasticsearch] = {}
+_clients_lock = threading.Lock()
+
+
+def _parse_value(raw: str, default):
+    if isinstance(default, bool):
+        return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    return raw
+
+
+def load_es_settings(config_path: Optional[str] = None, **overrides) -> Dict:
+    """
+    Đọc cấu hình client Elasticsearch.
+
+    Thứ tự ưu tiên (sau ghi đè trước): DEFAULT_ES_SETTINGS, file JSON
+    (config_path hoặc biến môi trường ES_CONFIG), biến môi trường ES_<KHÓA>
+    (vd. ES_HOST, ES_SEARCH_TIMEOUT), rồi các tham số overrides khác None.
+    """
+    settings = dict(DEFAULT_ES_SETTINGS)
+    config_path = config_path or os.environ.get('ES_CONFIG')
+    if config_path:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            file_settings = json.load(f)
+        unknown = set(file_settings) - set(DEFAULT_ES_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown Elasticsearch settings in {config_path}: {sorted(unknown)}")
+        settings.update(file_settings)
+    for key, default in DEFAULT_ES_SETTINGS.items():
+        raw = os.environ.get(f"{ENV_PREFIX}{key.upper()}")
+        if raw is not None:
+            settings[key] = _parse_value(raw, default)
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return settings
+
+
+def get_es_client(settings: Dict) -> Elasticsearch:
+    """
+    Trả về client Elasticsearch dùng chung cho các ElasticHandler cùng cấu hình trong process.
+
+    Client (và pool kết nối của nó) an toàn khi dùng từ nhiều thread. Key có pid
+    để process con sau fork (vd. worker gunicorn với --preload) tạo client riêng
+    thay vì dùng chung socket với process cha.
+    """
+    key = (os.getpid(), json.dumps(settings, sort_keys=True))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = Elasticsearch(
+                [{'host': settings['host'], 'port': settings['port'], 'scheme': settings['scheme']}],
+                **{option: settings[option] for option in _CLIENT_OPTIONS}
+            )
+            logger.info(f"Created Elasticsearch client for {settings['scheme']}://{settings['host']}:{settings['port']} "
+                        f"(connections_per_node={settings['connections_per_node']})")
+            _clients[key] = client
+        return client
+
+
+def create_async_es_client(settings: Dict):
+    """
+    Tạo AsyncElasticsearch (cần aiohttp) với cùng cấu hình như get_es_client.
+
+    Không dùng chung giữa các lần gọi: client async gắn với event loop tạo ra
+    nó, nên mỗi app ASGI tự tạo lúc khởi động và đóng (await client.close()) khi dừng.
+    """
+    from elasticsearch import AsyncElasticsearch
+
+    client = AsyncElasticsearch(
+        [{'host': settings['host'], 'port': settings['port'], 'scheme': settings['scheme']}],
+        **{option: settings[option] for option in _CLIENT_OPTIONS}
+    )
+    logger.info(f"Created AsyncElasticsearch client for {settings['scheme']}://{settings['host']}:{settings['port']} "
+                f"(connections_per_node={settings['connections_per_node']})")
+    return client
@@ -0,0 +1,58 @@
+"""Khóa độc quyền giữa các process trên một file (fcntl.flock, msvcrt.locking trên Windows)."""
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Khóa độc quyền trên file path (tạo nếu chưa có), dùng được như context manager.
+
+    Khóa gắn với file được mở nên cũng loại trừ hai đối tượng FileLock trong cùng
+    một process; các thread dùng chung một FileLock vẫn cần lock riêng.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Lấy khóa; với blocking=False trả về False ngay nếu process khác đang giữ."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        f = open(self.path, 'a+b')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            if blocking:
+                raise
+            return False
+        self._file = f
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        if fcntl is None:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        # Đóng file cũng nhả flock
+        self._file.close()
+        self._file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
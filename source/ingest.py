@@ -0,0 +1,277 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    from .blob_store import LocalBlobStore
+    from .ingest_manifest import IngestManifest
+    from .pdf_processor import Processor
+    from .search_backend import SearchBackend, create_search_backend
+except ImportError:
+    from blob_store import LocalBlobStore
+    from ingest_manifest import IngestManifest
+    from pdf_processor import Processor
+    from search_backend import SearchBackend, create_search_backend
+
+logger = logging.getLogger(__name__)
+
+
+def iter_pdf_files(directory: str) -> Iterator[str]:
+    """Duyệt cây thư mục và trả về dần đường dẫn các file PDF."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith('.pdf'):
+                yield os.path.join(root, filename)
+
+
+def file_sha256(pdf_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def iter_changed_files(directory: str, manifest: IngestManifest, summary: Dict,
+                       progress: Optional["IngestProgress"] = None) -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    Trả về dần (đường dẫn, stat) của các file PDF cần parse lại.
+
+    File có mtime/size giống manifest chỉ tốn một lần os.stat. File bị đổi mtime
+    được hash lại, và chỉ parse lại khi nội dung hoặc phiên bản trích xuất thay đổi.
+    Số file bỏ qua và lỗi được cộng vào summary, và vào progress như file bỏ qua.
+    """
+    for pdf_path in iter_pdf_files(directory):
+        try:
+            stat = os.stat(pdf_path)
+            if manifest.is_unchanged(pdf_path, stat):
+                summary['unchanged'] += 1
+                if progress is not None:
+                    progress.skip()
+                continue
+            if manifest.has_content(pdf_path, file_sha256(pdf_path)):
+                manifest.record(pdf_path, stat, manifest.get(pdf_path)['sha256'])
+                summary['unchanged'] += 1
+                if progress is not None:
+                    progress.skip()
+                continue
+        except OSError as e:
+            logger.error(f"Error reading {pdf_path}: {str(e)}")
+            summary['errors'].append({'id': pdf_path, 'status': None, 'error': str(e)})
+            if progress is not None:
+                progress.skip()
+            continue
+        yield pdf_path, stat
+
+
+def _record_batch(batch: List[Tuple[str, os.stat_result, Dict]], es_handler: SearchBackend,
+                  manifest: IngestManifest, summary: Dict) -> None:
+    """Index một batch và ghi các file đã index (hoặc đã có sẵn) vào manifest."""
+    result = es_handler.index_cvs(cv_data for _, _, cv_data in batch)
+    done = set(result['indexed']) | set(result['skipped'])
+    for pdf_path, stat, cv_data in batch:
+        if cv_data['cv_id'] in done:
+            manifest.record(pdf_path, stat, cv_data['cv_id'])
+    summary['indexed'] += len(result['indexed'])
+    summary['unchanged'] += len(result['skipped'])
+    summary['errors'].extend(result['errors'])
+    manifest.save()
+
+
+class IngestProgress:
+    """
+    Theo dõi số file đã xử lý, in thông lượng và thời gian còn lại (ETA) định kỳ ra stderr.
+
+    File bỏ qua vì không thay đổi (skip) được tính vào vị trí nhưng không vào thông lượng,
+    để ETA của lần chạy tiếp tục (đa số file đã có trong manifest) không bị sai lệch.
+    """
+
+    def __init__(self, interval: float = 5.0, stream=sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.started = time.monotonic()
+        self._last_report = self.started
+        # Tổng số file PDF, được đếm ở thread nền (None khi chưa đếm xong)
+        self.total: Optional[int] = None
+        self.done = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def count_in_background(self, directory: str) -> None:
+        def count():
+            self.total = sum(1 for _ in iter_pdf_files(directory))
+        threading.Thread(target=count, name="ingest-count", daemon=True).start()
+
+    def skip(self, count: int = 1) -> None:
+        self.advance(count, skipped=True)
+
+    def advance(self, count: int = 1, skipped: bool = False) -> None:
+        with self._lock:
+            if skipped:
+                self.skipped += count
+            else:
+                self.done += count
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+        self.report()
+
+    def report(self) -> None:
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        seen = self.done + self.skipped
+        if self.total is None:
+            position, eta = f"{seen}", "?"
+        else:
+            remaining = max(self.total - seen, 0)
+            position = f"{seen}/{self.total}"
+            eta = f"{remaining / rate:.0f}s" if rate > 0 else ("0s" if not remaining else "?")
+        print(f"[ingest] {position} files ({self.skipped} unchanged), {rate:.1f} files/s, "
+              f"elapsed {elapsed:.0f}s, ETA {eta}", file=self.stream, flush=True)
+
+
+def ingest_directory(directory: str, processor: Processor, es_handler: SearchBackend, manifest: IngestManifest,
+                     workers: Optional[int] = None, batch_size: int = 500, queue_size: int = 2,
+                     progress: Optional[IngestProgress] = None) -> Dict:
+    """
+    Ingest song song một cây thư mục lớn: parse PDF bằng process pool (process_many)
+    trong khi một thread khác index các batch đã parse xong.
+
+    Hai giai đoạn nối với nhau bằng hàng đợi giới hạn queue_size batch nên bộ nhớ
+    không tăng khi index chậm hơn parse. Manifest được lưu sau mỗi batch (checkpoint):
+    chạy lại sau khi bị ngắt chỉ xử lý các file chưa được index.
+
+    Returns:
+        Dict thống kê số file đã index, bỏ qua và lỗi.
+    """
+    summary = {'indexed': 0, 'unchanged': 0, 'errors': []}
+    # Thread index ghi thống kê riêng, gộp vào summary ở cuối
+    index_summary = {'indexed': 0, 'unchanged': 0, 'errors': []}
+    # stat của các file đang được parse, cần để ghi manifest sau khi index
+    stats: Dict[str, os.stat_result] = {}
+    batches: "queue.Queue[Optional[List]]" = queue.Queue(maxsize=queue_size)
+    index_errors: List[BaseException] = []
+
+    def index_worker():
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            try:
+                _record_batch(batch, es_handler, manifest, index_summary)
+            except BaseException as e:
+                # Dừng ở batch lỗi; các batch trước đã được checkpoint trong manifest
+                index_errors.append(e)
+                return
+            finally:
+                if progress is not None:
+                    progress.advance(len(batch))
+
+    def changed_paths():
+        for pdf_path, stat in iter_changed_files(directory, manifest, summary, progress):
+            stats[pdf_path] = stat
+            yield pdf_path
+
+    indexer = threading.Thread(target=index_worker, name="ingest-index", daemon=True)
+    indexer.start()
+
+    def put(item):
+        # Không chờ mãi nếu thread index đã dừng vì lỗi
+        while indexer.is_alive():
+            try:
+                batches.put(item, timeout=1)
+                return
+            except queue.Full:
+                continue
+
+    batch: List[Tuple[str, os.stat_result, Dict]] = []
+    try:
+        for pdf_path, cv_data, error in processor.process_many(changed_paths(), workers=workers):
+            stat = stats.pop(pdf_path)
+            if error is not None:
+                logger.error(f"Error processing {pdf_path}: {str(error)}")
+                summary['errors'].append({'id': pdf_path, 'status': None, 'error': str(error)})
+                if progress is not None:
+                    progress.advance()
+                continue
+            batch.append((pdf_path, stat, cv_data))
+            if len(batch) >= batch_size:
+                put(batch)
+                batch = []
+            if index_errors:
+                break
+        if batch and not index_errors:
+            put(batch)
+    finally:
+        put(None)
+        indexer.join()
+        manifest.save()
+
+    if index_errors:
+        raise index_errors[0]
+    summary['indexed'] += index_summary['indexed']
+    summary['unchanged'] += index_summary['unchanged']
+    summary['errors'].extend(index_summary['errors'])
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m source.ingest",
+        description="Ingest toàn bộ file PDF trong một cây thư mục vào search backend (SEARCH_BACKEND)."
+    )
+    parser.add_argument('directory', help='Thư mục chứa CV (PDF), duyệt đệ quy')
+    parser.add_argument('--manifest', help='File manifest (mặc định DIRECTORY/.ingest_manifest.json)')
+    parser.add_argument('--workers', type=int, default=None, help='Số process parse PDF (mặc định số CPU)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Số CV mỗi lần index_cvs')
+    parser.add_argument('--queue-size', type=int, default=2, help='Số batch tối đa chờ index')
+    parser.add_argument('--progress-interval', type=float, default=5.0, help='Số giây giữa các lần in tiến độ')
+    parser.add_argument('--keep-settings', action='store_true',
+                        help='Không tắt refresh/replica của index trong lúc nạp')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    manifest_path = args.manifest or os.path.join(args.directory, '.ingest_manifest.json')
+    manifest = IngestManifest(manifest_path, Processor.EXTRACTION_VERSION)
+    processor = Processor(blob_store=LocalBlobStore())
+    es_handler = create_search_backend()
+    if os.environ.get('RERANK', '0') == '1':
+        # Như app.py: tính embedding lúc index để CV nạp bằng CLI cũng được xếp hạng lại
+        try:
+            from .reranker import DEFAULT_STORE_DIR, Reranker
+        except ImportError:
+            from reranker import DEFAULT_STORE_DIR, Reranker
+        es_handler.reranker = Reranker(store_dir=os.environ.get('RERANK_STORE', DEFAULT_STORE_DIR))
+    es_handler.create_index()
+
+    progress = IngestProgress(interval=args.progress_interval)
+    progress.count_in_background(args.directory)
+    bulk_load = nullcontext() if args.keep_settings else es_handler.bulk_load()
+    try:
+        with bulk_load:
+            summary = ingest_directory(args.directory, processor, es_handler, manifest, workers=args.workers,
+                                       batch_size=args.batch_size, queue_size=args.queue_size, progress=progress)
+    except KeyboardInterrupt:
+        print("[ingest] interrupted, progress saved to manifest; run again to resume", file=sys.stderr)
+        return 130
+    progress.report()
+    print(json.dumps({
+        'indexed': summary['indexed'],
+        'unchanged': summary['unchanged'],
+        'errors': summary['errors']
+    }, indent=2))
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, Optional
+
+
+class IngestManifest:
+    """
+    Ghi lại các file PDF đã ingest (hash, mtime, size, phiên bản trích xuất)
+    để lần chạy sau bỏ qua file không thay đổi chỉ với một lần os.stat.
+    """
+
+    def __init__(self, path: str, extraction_version: int):
+        self.path = path
+        self.extraction_version = extraction_version
+        self.entries: Dict[str, Dict] = {}
+        # record() và save() có thể được gọi từ các thread khác nhau (xem ingest_directory)
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def _key(pdf_path: str) -> str:
+        return os.path.abspath(pdf_path)
+
+    def get(self, pdf_path: str) -> Optional[Dict]:
+        return self.entries.get(self._key(pdf_path))
+
+    def is_unchanged(self, pdf_path: str, stat: os.stat_result) -> bool:
+        """File không đổi nếu mtime, size và phiên bản trích xuất giống lần ingest trước."""
+        entry = self.get(pdf_path)
+        return (
+            entry is not None
+            and entry['mtime_ns'] == stat.st_mtime_ns
+            and entry['size'] == stat.st_size
+            and entry['extraction_version'] == self.extraction_version
+        )
+
+    def has_content(self, pdf_path: str, sha256: str) -> bool:
+        """File bị touch (mtime đổi) nhưng nội dung và phiên bản trích xuất vẫn như cũ."""
+        entry = self.get(pdf_path)
+        return (
+            entry is not None
+            and entry['sha256'] == sha256
+            and entry['extraction_version'] == self.extraction_version
+        )
+
+    def record(self, pdf_path: str, stat: os.stat_result, sha256: str) -> None:
+        entry = {
+            'sha256': sha256,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'extraction_version': self.extraction_version
+        }
+        with self._lock:
+            self.entries[self._key(pdf_path)] = entry
+
+    def save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # Ghi ra file tạm rồi đổi tên để manifest không bị hỏng khi bị ngắt giữa chừng
+        with self._lock:
+            data = json.dumps(self.entries)
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
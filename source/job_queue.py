@@ -0,0 +1,265 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+
+
+# Thời gian (giây) một worker giữ file đã claim; worker còn sống gia hạn định kỳ (xem IngestWorkerPool)
+DEFAULT_LEASE_SECONDS = 300
+
+
+class JobQueue:
+    """
+    Hàng đợi ingest CV lưu trong SQLite, nên các file chưa xử lý vẫn còn sau khi restart.
+
+    Mỗi job gồm nhiều file; trạng thái từng file: pending -> processing -> success/error.
+    File processing được ghi kèm owner (process đã claim) và lease_expires; chỉ claim đã
+    hết hạn mới được lấy lại, nên nhiều process dùng chung một jobs.db (gunicorn -w N,
+    reloader của Flask) không xử lý trùng file của nhau.
+    """
+
+    def __init__(self, db_path: str = "jobs.db", lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self._owner_suffix = uuid.uuid4().hex[:8]
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    created_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS job_files (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL REFERENCES jobs(id),
+                    filename TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    doc_id TEXT,
+                    error TEXT,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_job_files_status ON job_files(status);
+                CREATE INDEX IF NOT EXISTS idx_job_files_job ON job_files(job_id);
+            """)
+            # jobs.db tạo trước khi có lease
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(job_files)")}
+            if 'owner' not in columns:
+                conn.execute("ALTER TABLE job_files ADD COLUMN owner TEXT")
+            if 'lease_expires' not in columns:
+                conn.execute("ALTER TABLE job_files ADD COLUMN lease_expires REAL")
+
+    @property
+    def owner(self) -> str:
+        """Id của process hiện tại (theo pid, nên process con sau fork có id riêng)."""
+        return f"{socket.gethostname()}:{os.getpid()}:{self._owner_suffix}"
+
+    @contextmanager
+    def _connect(self):
+        # Mỗi thao tác dùng một connection riêng để an toàn khi gọi từ nhiều thread
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def create_job(self, files: List[Tuple[str, str]]) -> str:
+        """Tạo job từ danh sách (filename, path) đã lưu trên đĩa, trả về job id."""
+        job_id = uuid.uuid4().hex
+        now = _now()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("INSERT INTO jobs (id, created_at) VALUES (?, ?)", (job_id, now))
+            conn.executemany(
+                "INSERT INTO job_files (job_id, filename, path, status, updated_at) VALUES (?, ?, ?, 'pending', ?)",
+                [(job_id, filename, path, now) for filename, path in files]
+            )
+            conn.execute("COMMIT")
+        return job_id
+
+    def claim_next(self) -> Optional[Dict]:
+        """
+        Lấy file pending tiếp theo (hoặc file processing đã hết lease) và đánh dấu
+        processing với lease của process này (nguyên tử giữa các worker và process).
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, job_id, filename, path FROM job_files "
+                "WHERE status = 'pending' OR (status = 'processing' AND COALESCE(lease_expires, 0) < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE job_files SET status = 'processing', owner = ?, lease_expires = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (self.owner, now + self.lease_seconds, _now(), row['id'])
+                )
+            conn.execute("COMMIT")
+        return dict(row) if row is not None else None
+
+    def renew(self, file_ids: List[int]) -> None:
+        """Gia hạn lease của các file mà process này đang xử lý."""
+        if not file_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE job_files SET lease_expires = ? WHERE id = ? AND status = 'processing' AND owner = ?",
+                [(time.time() + self.lease_seconds, file_id, self.owner) for file_id in file_ids]
+            )
+
+    def complete(self, file_id: int, doc_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE job_files SET status = 'success', doc_id = ?, updated_at = ? WHERE id = ?",
+                (doc_id, _now(), file_id)
+            )
+
+    def fail(self, file_id: int, error: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE job_files SET status = 'error', error = ?, updated_at = ? WHERE id = ?",
+                (error, _now(), file_id)
+            )
+
+    def requeue_interrupted(self) -> int:
+        """
+        Đưa các file processing đã hết lease (process giữ nó đã dừng) về lại pending.
+
+        File mà process khác còn sống đang xử lý (lease còn hạn) không bị động tới.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE job_files SET status = 'pending', owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE status = 'processing' AND COALESCE(lease_expires, 0) < ?",
+                (_now(), time.time())
+            )
+            return cursor.rowcount
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            job = conn.execute("SELECT id, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            files = conn.execute(
+                "SELECT filename, status, doc_id, error, updated_at FROM job_files WHERE job_id = ? ORDER BY id",
+                (job_id,)
+            ).fetchall()
+
+        files = [dict(f) for f in files]
+        counts = {status: 0 for status in ('pending', 'processing', 'success', 'error')}
+        for f in files:
+            counts[f['status']] += 1
+        done = counts['success'] + counts['error']
+        if done == len(files):
+            status = 'completed'
+        elif done or counts['processing']:
+            status = 'running'
+        else:
+            status = 'queued'
+        return {
+            'job_id': job['id'],
+            'created_at': job['created_at'],
+            'status': status,
+            'progress': counts,
+            'total': len(files),
+            'files': files
+        }
+
+
+class IngestWorkerPool:
+    """Các thread nền lấy file từ JobQueue, parse bằng Processor và index bằng ElasticHandler."""
+
+    def __init__(self, queue: JobQueue, processor, es_handler, workers: int = 2, poll_interval: float = 2.0):
+        self.queue = queue
+        self.processor = processor
+        self.es_handler = es_handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        # Các file đang xử lý, được gia hạn lease bởi thread heartbeat
+        self._active: Dict[int, None] = {}
+        self._active_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Khởi động các worker (gọi nhiều lần không sao)."""
+        with self._lock:
+            if self._threads:
+                return
+            requeued = self.queue.requeue_interrupted()
+            if requeued:
+                logger.info(f"Requeued {requeued} interrupted upload(s)")
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"ingest-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            heartbeat = threading.Thread(target=self._heartbeat, name="ingest-heartbeat", daemon=True)
+            heartbeat.start()
+            self._threads.append(heartbeat)
+
+    def notify(self) -> None:
+        """Báo cho worker biết có file mới thay vì chờ hết poll_interval."""
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            item = self.queue.claim_next()
+            if item is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._process(item)
+
+    def _heartbeat(self) -> None:
+        # Gia hạn lease sớm (mỗi 1/3 thời gian lease) để file đang xử lý lâu không bị process khác lấy lại
+        while not self._stopped.wait(self.queue.lease_seconds / 3):
+            with self._active_lock:
+                file_ids = list(self._active)
+            try:
+                self.queue.renew(file_ids)
+            except sqlite3.Error as e:
+                logger.warning(f"Could not renew ingest leases: {e}")
+
+    def _process(self, item: Dict) -> None:
+        with self._active_lock:
+            self._active[item['id']] = None
+        try:
+            cv_data = self.processor.process_pdf(item['path'])
+            doc_id = self.es_handler.index_cv(cv_data)
+            self.queue.complete(item['id'], doc_id)
+        except Exception as e:
+            logger.error(f"Error ingesting {item['filename']}: {str(e)}")
+            self.queue.fail(item['id'], str(e))
+        finally:
+            with self._active_lock:
+                self._active.pop(item['id'], None)
+            # File được lưu trong thư mục riêng (xem /upload), xóa cả thư mục
+            try:
+                os.remove(item['path'])
+                os.rmdir(os.path.dirname(item['path']))
+            except OSError:
+                pass
@@ -0,0 +1,585 @@
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    from .file_lock import FileLock
+    from .metrics import SEARCH_BACKEND_SECONDS
+    from .search_backend import SKILL_IDS_BOOST, SearchBackend
+except ImportError:
+    from file_lock import FileLock
+    from metrics import SEARCH_BACKEND_SECONDS
+    from search_backend import SKILL_IDS_BOOST, SearchBackend
+
+# Các trường được đánh chỉ mục và highlight (giống truy vấn của ElasticHandler)
+INDEXED_FIELDS = ("skills", "experience", "profile")
+
+# Danh sách stop word mặc định (_english_) của filter "stop" trong Elasticsearch
+STOP_WORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in", "into", "is", "it",
+    "no", "not", "of", "on", "or", "such", "that", "the", "their", "then", "there", "these",
+    "they", "this", "to", "was", "will", "with"
+])
+
+_TOKEN_RE = re.compile(r'\w+')
+
+# Tham số BM25 mặc định của Elasticsearch
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Tương đương fuzziness AUTO, prefix_length 2, max_expansions 50 trong ElasticHandler
+FUZZY_PREFIX_LENGTH = 2
+FUZZY_MAX_EXPANSIONS = 50
+
+HIGHLIGHT_FRAGMENT_SIZE = 150
+HIGHLIGHT_FRAGMENTS = 3
+
+# Số kết quả mở rộng fuzzy được giữ lại giữa các lần tìm kiếm
+EXPANSION_CACHE_SIZE = 50000
+
+# Phiên bản định dạng file trên đĩa
+FORMAT_VERSION = 1
+
+# Thư mục chỉ mục mặc định, cố định theo vị trí package như DEFAULT_BLOB_DIR
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "local_index")
+
+# CV index bằng index_cv được ghi nối vào file này (mỗi dòng một CV) thay vì ghi lại
+# toàn bộ chỉ mục; khi đủ flush_every CV (hoặc gọi flush()) chỉ mục mới được ghi lại
+PENDING_LOG = "pending.jsonl"
+# Giữ suốt thời gian một LocalSearchBackend mở chỉ mục: save() ghi lại toàn bộ chỉ mục từ bộ
+# nhớ nên hai process cùng ghi sẽ làm mất CV của nhau
+LOCK_FILE = "write.lock"
+DEFAULT_FLUSH_EVERY = 1000
+
+
+@lru_cache(maxsize=65536)
+def _stem(token: str) -> str:
+    """Stemmer nhẹ cho số nhiều tiếng Anh (thay cho snowball của cv_analyzer)."""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith('es') and token[-3] in 'sxz':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+        return token[:-1]
+    return token
+
+
+def analyze(text: str) -> List[Tuple[str, int, int]]:
+    """Tách text thành các (term, start, end): lowercase, bỏ stop word, stem."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text or ""):
+        token = match.group().lower()
+        if token in STOP_WORDS:
+            continue
+        tokens.append((_stem(token), match.start(), match.end()))
+    return tokens
+
+
+def _max_edits(term: str) -> int:
+    """Số lỗi cho phép theo fuzziness AUTO."""
+    if len(term) <= 2:
+        return 0
+    if len(term) <= 5:
+        return 1
+    return 2
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Khoảng cách Damerau-Levenshtein (có hoán vị kề nhau), dừng sớm khi vượt limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class _FieldIndex:
+    """
+    Chỉ mục đảo của một trường.
+
+    Postings đã lưu nằm trong file <field>.postings (các cặp int32 doc, tf) và được
+    đọc qua mmap; postings của các CV mới thêm nằm trong bộ nhớ cho tới lần save() tiếp theo.
+    """
+
+    def __init__(self):
+        self.lengths = array('i')
+        self.total_length = 0
+        self.stored_terms: Dict[str, Tuple[int, int]] = {}
+        self.memory_postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.by_prefix: Dict[str, Set[str]] = {}
+        self._mmap = None
+        self._view = None
+
+    def load(self, directory: str, field: str) -> None:
+        with open(os.path.join(directory, f"{field}.terms.json"), 'r', encoding='utf-8') as f:
+            self.stored_terms = {term: tuple(entry) for term, entry in json.load(f).items()}
+        with open(os.path.join(directory, f"{field}.lengths"), 'rb') as f:
+            self.lengths = array('i')
+            self.lengths.frombytes(f.read())
+        self.total_length = sum(self.lengths)
+        self.memory_postings = {}
+        self.close()
+        postings_path = os.path.join(directory, f"{field}.postings")
+        if os.path.getsize(postings_path):
+            with open(postings_path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap).cast('i')
+        self.by_prefix = {}
+        for term in self.stored_terms:
+            self.by_prefix.setdefault(term[:FUZZY_PREFIX_LENGTH], set()).add(term)
+
+    def close(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def add(self, ordinal: int, terms: List[str]) -> None:
+        counts: Dict[str, int] = {}
+        for term in terms:
+            counts[term] = counts.get(term, 0) + 1
+        for term, tf in counts.items():
+            if term not in self.memory_postings and term not in self.stored_terms:
+                self.by_prefix.setdefault(term[:FUZZY_PREFIX_LENGTH], set()).add(term)
+            self.memory_postings.setdefault(term, []).append((ordinal, tf))
+        self.lengths.append(len(terms))
+        self.total_length += len(terms)
+
+    def doc_freq(self, term: str) -> int:
+        stored = self.stored_terms.get(term)
+        return (stored[1] if stored else 0) + len(self.memory_postings.get(term, ()))
+
+    def postings(self, term: str) -> Iterable[Tuple[int, int]]:
+        stored = self.stored_terms.get(term)
+        if stored:
+            offset, count = stored
+            view = self._view[2 * offset:2 * (offset + count)]
+            for i in range(0, 2 * count, 2):
+                yield view[i], view[i + 1]
+        yield from self.memory_postings.get(term, ())
+
+    def save(self, directory: str, field: str) -> None:
+        """Ghi chỉ mục của trường ra đĩa; mmap bị đóng, cần load() lại sau đó."""
+        terms = {}
+        postings = array('i')
+        for term in sorted(set(self.stored_terms) | set(self.memory_postings)):
+            offset = len(postings) // 2
+            for ordinal, tf in self.postings(term):
+                postings.append(ordinal)
+                postings.append(tf)
+            terms[term] = [offset, len(postings) // 2 - offset]
+        # Không thay được file đang được mmap trên Windows
+        self.close()
+        _atomic_write(os.path.join(directory, f"{field}.postings"), postings.tobytes())
+        _atomic_write(os.path.join(directory, f"{field}.lengths"), self.lengths.tobytes())
+        _atomic_write(os.path.join(directory, f"{field}.terms.json"), json.dumps(terms).encode('utf-8'))
+
+
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class LocalSearchBackend(SearchBackend):
+    """
+    Backend tìm kiếm chạy trong process, không cần Elasticsearch.
+
+    Chỉ mục đảo với điểm BM25, boost theo trường giống ElasticHandler (skills^3,
+    experience^2, ...), mở rộng fuzzy khi bật fuzzy_matching (fuzziness AUTO,
+    prefix_length 2) và highlight.
+    Dữ liệu được lưu trong index_dir và postings được đọc bằng mmap khi load.
+    CV thêm bằng index_cv được ghi nối vào PENDING_LOG (chi phí không phụ thuộc số CV
+    đã có) và được gộp vào chỉ mục mỗi flush_every CV, khi gọi flush() hoặc khi
+    kết thúc bulk_load; lúc load, các CV còn trong log được đọc lại vào bộ nhớ.
+    Mỗi lúc chỉ một process (app hoặc CLI ingest) được mở một index_dir (LOCK_FILE);
+    process thứ hai báo lỗi thay vì ghi đè CV của process kia.
+    """
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR, index_name: str = "cvs",
+                 flush_every: int = DEFAULT_FLUSH_EVERY):
+        super().__init__(index_name=index_name)
+        self.index_dir = index_dir
+        self.flush_every = flush_every
+        # Số CV chỉ có trong PENDING_LOG, chưa được ghi vào chỉ mục
+        self._pending = 0
+        # Trong bulk_load không tự flush, chỉ flush một lần ở cuối
+        self._bulk_loading = False
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._ordinals: Dict[str, int] = {}
+        self._sources: List[Dict] = []
+        self._fields = {field: _FieldIndex() for field in INDEXED_FIELDS}
+        # skill_id -> các CV có kỹ năng đó (dựng lại từ docs.json khi load)
+        self._skill_docs: Dict[str, Set[int]] = {}
+        # Kết quả _expand theo (field, term); tính khoảng cách chuỗi là phần tốn nhất của truy vấn
+        self._expansions: Dict[Tuple[str, str], List[Tuple[str, float]]] = {}
+        self._file_lock = FileLock(os.path.join(index_dir, LOCK_FILE))
+        if not self._file_lock.acquire(blocking=False):
+            raise RuntimeError(f"Local index {index_dir} is already open by another process "
+                               f"(stop it first, or use SEARCH_BACKEND=elastic for several writers)")
+        self.create_index()
+
+    def close(self) -> None:
+        """Đóng mmap và nhả khóa index_dir (các CV chưa flush vẫn còn trong PENDING_LOG)."""
+        with self._lock:
+            for field_index in self._fields.values():
+                field_index.close()
+            self._file_lock.release()
+
+    def create_index(self) -> None:
+        """Tạo thư mục chỉ mục hoặc load chỉ mục đã lưu."""
+        with self._lock:
+            os.makedirs(self.index_dir, exist_ok=True)
+            meta_path = os.path.join(self.index_dir, "meta.json")
+            if not self._ids:
+                if os.path.exists(meta_path):
+                    self._load()
+                self._replay_pending()
+
+    def _load(self) -> None:
+        with open(os.path.join(self.index_dir, "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported local index format in {self.index_dir}")
+        with open(os.path.join(self.index_dir, "docs.json"), 'r', encoding='utf-8') as f:
+            docs = json.load(f)
+        self._ids = [doc_id for doc_id, _ in docs]
+        self._sources = [source for _, source in docs]
+        self._ordinals = {doc_id: ordinal for ordinal, doc_id in enumerate(self._ids)}
+        self._skill_docs = {}
+        for ordinal, source in enumerate(self._sources):
+            for skill_id in source.get('skill_ids', []):
+                self._skill_docs.setdefault(skill_id, set()).add(ordinal)
+        for field, field_index in self._fields.items():
+            field_index.load(self.index_dir, field)
+        self.logger.info(f"Loaded {len(self._ids)} CVs from {self.index_dir}")
+
+    def _replay_pending(self) -> None:
+        """Đọc lại các CV trong PENDING_LOG (đã index nhưng chưa được flush)."""
+        log_path = os.path.join(self.index_dir, PENDING_LOG)
+        if not os.path.exists(log_path):
+            return
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    cv_data = json.loads(line)
+                except ValueError:
+                    # Dòng cuối ghi dở khi process bị dừng
+                    self.logger.warning(f"Ignoring truncated entry in {log_path}")
+                    continue
+                if self._add(cv_data):
+                    self._pending += 1
+        if self._pending:
+            self.logger.info(f"Replayed {self._pending} pending CVs from {log_path}")
+
+    def _append_pending(self, cvs: List[Dict]) -> None:
+        with open(os.path.join(self.index_dir, PENDING_LOG), 'a', encoding='utf-8') as f:
+            f.writelines(json.dumps(cv_data) + '\n' for cv_data in cvs)
+        self._pending += len(cvs)
+
+    def flush(self) -> None:
+        """Gộp các CV còn trong PENDING_LOG vào chỉ mục trên đĩa."""
+        with self._lock:
+            if self._pending:
+                self.save()
+        super().flush()
+
+    @contextmanager
+    def bulk_load(self) -> Iterator[None]:
+        """Không flush sau mỗi flush_every CV trong khối with, chỉ flush một lần ở cuối."""
+        with self._lock:
+            self._bulk_loading = True
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._bulk_loading = False
+            self.flush()
+
+    def save(self) -> None:
+        """Ghi toàn bộ chỉ mục ra đĩa (kể cả CV trong PENDING_LOG) rồi mở lại postings bằng mmap."""
+        with self._lock:
+            for field, field_index in self._fields.items():
+                field_index.save(self.index_dir, field)
+            _atomic_write(
+                os.path.join(self.index_dir, "docs.json"),
+                json.dumps(list(zip(self._ids, self._sources))).encode('utf-8')
+            )
+            _atomic_write(
+                os.path.join(self.index_dir, "meta.json"),
+                json.dumps({'format_version': FORMAT_VERSION, 'num_docs': len(self._ids)}).encode('utf-8')
+            )
+            for field, field_index in self._fields.items():
+                field_index.load(self.index_dir, field)
+            # Mọi CV trong log đã nằm trong chỉ mục vừa ghi
+            try:
+                os.remove(os.path.join(self.index_dir, PENDING_LOG))
+            except FileNotFoundError:
+                pass
+            self._pending = 0
+
+    def _add(self, cv_data: Dict) -> bool:
+        document_id = cv_data.get('cv_id')
+        if not document_id:
+            raise ValueError("cv_id is required for indexing")
+        if document_id in self._ordinals:
+            return False
+        ordinal = len(self._ids)
+        self._ids.append(document_id)
+        self._ordinals[document_id] = ordinal
+        self._sources.append(cv_data)
+        self._expansions.clear()
+        for skill_id in cv_data.get('skill_ids', []):
+            self._skill_docs.setdefault(skill_id, set()).add(ordinal)
+        for field, field_index in self._fields.items():
+            field_index.add(ordinal, [term for term, _, _ in analyze(cv_data.get(field, ""))])
+        return True
+
+    def index_cv(self, cv_data: Dict) -> str:
+        with self._lock, SEARCH_BACKEND_SECONDS.time(backend="local", operation="index"):
+            if self._add(cv_data):
+                self._append_pending([cv_data])
+                if self._pending >= self.flush_every and not self._bulk_loading:
+                    self.save()
+                self.bump_generation()
+            else:
+                self.logger.info(f"Document with cv_id {cv_data['cv_id']} already exists. Skipping indexing.")
+        self.embed_cvs([cv_data])
+        return cv_data['cv_id']
+
+    def index_cvs(self, cvs: Iterable[Dict], **kwargs) -> Dict:
+        """
+        Index nhiều CV, lưu ra đĩa một lần ở cuối (trong bulk_load thì ghi vào PENDING_LOG
+        và chỉ lưu khi kết thúc khối with). Tham số bulk của Elasticsearch được bỏ qua.
+        """
+        summary = {'indexed': [], 'skipped': [], 'errors': []}
+        done = []
+        added = []
+        with self._lock, SEARCH_BACKEND_SECONDS.time(backend="local", operation="bulk"):
+            for cv_data in cvs:
+                try:
+                    if self._add(cv_data):
+                        summary['indexed'].append(cv_data['cv_id'])
+                        added.append(cv_data)
+                    else:
+                        summary['skipped'].append(cv_data['cv_id'])
+                    done.append(cv_data)
+                except ValueError as e:
+                    summary['errors'].append({'id': cv_data.get('cv_id'), 'status': None, 'error': str(e)})
+            if summary['indexed']:
+                if self._bulk_loading:
+                    self._append_pending(added)
+                else:
+                    self.save()
+                self.bump_generation()
+        self.embed_cvs(done)
+        return summary
+
+    def open_point_in_time(self, keep_alive: str = "1m") -> str:
+        # Không có snapshot thật: search_after dựa trên (score, ordinal) là đủ ổn định
+        # vì CV chỉ được thêm vào, không bị sửa hay xóa.
+        return "local"
+
+    def close_point_in_time(self, pit_id: str) -> None:
+        pass
+
+    def get_document(self, index, doc_id, source_includes: Optional[List[str]] = None):
+        with self._lock:
+            ordinal = self._ordinals.get(doc_id)
+            if ordinal is None:
+                return None
+            source = self._sources[ordinal]
+        if source_includes is not None:
+            source = {key: value for key, value in source.items() if key in source_includes}
+        return {'_index': self.index_name, '_id': doc_id, 'found': True, '_source': source}
+
+    def _expand(self, field: str, term: str) -> List[Tuple[str, float]]:
+        """Các term trong chỉ mục gần đúng với term, kèm trọng số (1.0 nếu khớp chính xác)."""
+        expansions = self._expansions.get((field, term))
+        if expansions is None:
+            if len(self._expansions) >= EXPANSION_CACHE_SIZE:
+                self._expansions.clear()
+            expansions = self._expansions[(field, term)] = self._compute_expansions(field, term)
+        return expansions
+
+    def _compute_expansions(self, field: str, term: str) -> List[Tuple[str, float]]:
+        field_index = self._fields[field]
+        max_edits = _max_edits(term) if self.fuzzy_matching else 0
+        if max_edits == 0:
+            return [(term, 1.0)] if field_index.doc_freq(term) else []
+        candidates = []
+        for candidate in field_index.by_prefix.get(term[:FUZZY_PREFIX_LENGTH], ()):
+            distance = _edit_distance(term, candidate, max_edits)
+            if distance <= max_edits:
+                candidates.append((distance, -field_index.doc_freq(candidate), candidate))
+        candidates.sort()
+        return [(candidate, 1.0 - distance / (len(term) + 1))
+                for distance, _, candidate in candidates[:FUZZY_MAX_EXPANSIONS]]
+
+    def _match_field(self, field: str, terms: List[str], matched_terms: Set[Tuple[str, str]]) -> Dict[int, Tuple[float, int]]:
+        """Điểm BM25 của từng CV trên một trường: {ordinal: (score, số term khớp)}."""
+        field_index = self._fields[field]
+        num_docs = len(self._ids)
+        avg_length = field_index.total_length / num_docs if num_docs else 0.0
+        results: Dict[int, Tuple[float, int]] = {}
+        for term in terms:
+            best: Dict[int, float] = {}
+            for variant, weight in self._expand(field, term):
+                doc_freq = field_index.doc_freq(variant)
+                idf = math.log(1 + (num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+                for ordinal, tf in field_index.postings(variant):
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * field_index.lengths[ordinal] / (avg_length or 1))
+                    score = weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    if score > best.get(ordinal, 0.0):
+                        best[ordinal] = score
+                matched_terms.add((field, variant))
+            for ordinal, score in best.items():
+                total, count = results.get(ordinal, (0.0, 0))
+                results[ordinal] = (total + score, count + 1)
+        return results
+
+    def _best_fields(self, text: str, boosts: Dict[str, float], minimum_should_match: float,
+                     matched_terms: Set[Tuple[str, str]]) -> Dict[int, float]:
+        """Tương đương multi_match type best_fields: lấy điểm cao nhất giữa các trường."""
+        terms = list(dict.fromkeys(term for term, _, _ in analyze(text)))
+        if not terms:
+            return {}
+        required = max(1, int(len(terms) * minimum_should_match))
+        scores: Dict[int, float] = {}
+        for field, boost in boosts.items():
+            for ordinal, (score, count) in self._match_field(field, terms, matched_terms).items():
+                if count >= required and boost * score > scores.get(ordinal, 0.0):
+                    scores[ordinal] = boost * score
+        return scores
+
+    def _score(self, job_requirements: str, job_responsibilities: str,
+               matched_terms: Set[Tuple[str, str]]) -> Dict[int, float]:
+        clauses = [
+            self._best_fields(job_requirements, {"skills": 3, "experience": 2, "profile": 1}, 0.7, matched_terms),
+            self._best_fields(job_responsibilities, {"experience": 3, "profile": 2, "skills": 1}, 0.6, matched_terms),
+            # Tương ứng truy vấn terms trên skill_ids trong ElasticHandler
+            self._skill_scores(f"{job_requirements} {job_responsibilities}"),
+        ]
+        scores: Dict[int, float] = {}
+        for clause in clauses:
+            for ordinal, score in clause.items():
+                scores[ordinal] = scores.get(ordinal, 0.0) + score
+        return scores
+
+    def _skill_scores(self, text: str) -> Dict[int, float]:
+        scores: Dict[int, float] = {}
+        for skill_id in self.skill_matcher.match(text):
+            for ordinal in self._skill_docs.get(skill_id, ()):
+                scores[ordinal] = SKILL_IDS_BOOST
+        return scores
+
+    def _highlight(self, text: str, terms: Set[str]) -> List[str]:
+        """Đánh dấu các term khớp bằng <strong>, trả về tối đa 3 đoạn ~150 ký tự theo thứ tự trong văn bản."""
+        fragments = []
+        fragment_start, fragment_end = None, None
+        parts: List[str] = []
+        for term, start, end in analyze(text):
+            if term not in terms:
+                continue
+            if fragment_start is None or end - fragment_start > HIGHLIGHT_FRAGMENT_SIZE:
+                if fragment_start is not None:
+                    parts.append(text[fragment_end:self._fragment_stop(text, fragment_start)])
+                    fragments.append(''.join(parts))
+                    if len(fragments) == HIGHLIGHT_FRAGMENTS:
+                        return fragments
+                # Bắt đầu đoạn mới từ đầu từ gần nhất phía trước
+                fragment_start = text.rfind(' ', 0, max(start - 20, 0)) + 1 if start > 20 else 0
+                fragment_end = fragment_start
+                parts = []
+            parts.append(f"{text[fragment_end:start]}<strong>{text[start:end]}</strong>")
+            fragment_end = end
+        if fragment_start is not None:
+            parts.append(text[fragment_end:self._fragment_stop(text, fragment_start)])
+            fragments.append(''.join(parts))
+        return fragments
+
+    @staticmethod
+    def _fragment_stop(text: str, fragment_start: int) -> int:
+        stop = fragment_start + HIGHLIGHT_FRAGMENT_SIZE
+        if stop >= len(text):
+            return len(text)
+        space = text.rfind(' ', fragment_start, stop)
+        return space if space > fragment_start else stop
+
+    def search_cv_by_jd(self, job_requirements: str, job_responsibilities: str, size: int = 5, from_: int = 0,
+                        search_after: Optional[List] = None, pit_id: Optional[str] = None, keep_alive: str = "1m"):
+        """Tìm CV theo JD, trả về dict cùng cấu trúc với response của Elasticsearch."""
+        started = time.perf_counter()
+        matched_terms: Set[Tuple[str, str]] = set()
+        with self._lock:
+            scores = self._score(job_requirements, job_responsibilities, matched_terms)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            max_score = ranked[0][1] if ranked else None
+            if pit_id is not None:
+                if search_after is not None:
+                    after = (-search_after[0], search_after[1])
+                    ranked = [item for item in ranked if (-item[1], item[0]) > after]
+                page = ranked[:size]
+            else:
+                page = ranked[from_:from_ + size]
+
+            hits = []
+            for ordinal, score in page:
+                source = self._sources[ordinal]
+                hit = {
+                    '_index': self.index_name,
+                    '_id': self._ids[ordinal],
+                    '_score': score,
+                    '_source': {key: source[key] for key in ("cv_id", "metadata") if key in source}
+                }
+                highlight = {}
+                for field in INDEXED_FIELDS:
+                    fragments = self._highlight(
+                        source.get(field, ""),
+                        {term for matched_field, term in matched_terms if matched_field == field}
+                    )
+                    if fragments:
+                        highlight[field] = fragments
+                if highlight:
+                    hit['highlight'] = highlight
+                if pit_id is not None:
+                    hit['sort'] = [score, ordinal]
+                hits.append(hit)
+
+        response = {
+            'took': int((time.perf_counter() - started) * 1000),
+            'timed_out': False,
+            'hits': {
+                'total': {'value': len(scores), 'relation': 'eq'},
+                'max_score': max_score,
+                'hits': hits
+            }
+        }
+        if pit_id is not None:
+            response['pit_id'] = pit_id
+        SEARCH_BACKEND_SECONDS.observe(time.perf_counter() - started, backend="local", operation="search")
+        return response
@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Ngưỡng (giây) của các bucket histogram, từ 1ms tới 30s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = []
+    for key, value in items:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    """Histogram thời gian theo nhãn (vd. stage="extract"), an toàn khi dùng từ nhiều thread."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # nhãn -> [số đếm theo bucket..., tổng, số lần]
+        self._series: Dict[Tuple[Tuple[str, str], ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(bound)))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {values[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {values[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {values[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Tập các histogram của process, xuất ra dạng text của Prometheus."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, help_text, buckets)
+            return self._histograms[name]
+
+    def render(self, gauges: Optional[Dict[str, Tuple[str, float]]] = None) -> str:
+        """
+        Nội dung cho endpoint /metrics.
+
+        gauges: các giá trị đọc tại thời điểm scrape, dạng {tên: (mô tả, giá trị)}.
+        """
+        lines = []
+        with self._lock:
+            histograms = list(self._histograms.values())
+        for histogram in histograms:
+            lines.extend(histogram.render())
+        for name, (help_text, value) in sorted((gauges or {}).items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+# Registry mặc định dùng chung trong process
+REGISTRY = MetricsRegistry()
+
+PROCESSOR_STAGE_SECONDS = REGISTRY.histogram(
+    "cv_processor_stage_seconds", "Time spent in each Processor stage (read, extract, clean, parse, encode)."
+)
+SEARCH_BACKEND_SECONDS = REGISTRY.histogram(
+    "search_backend_request_seconds", "Time spent in search backend calls, by backend and operation."
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_seconds", "HTTP request latency by endpoint, method and status."
+)
+
+
+class SamplingProfiler:
+    """
+    Profiler lấy mẫu stack của một thread theo chu kỳ (mặc định 5ms) từ một thread nền.
+
+    Kết quả dạng "collapsed stacks" (mỗi dòng "hàm;hàm;hàm số_mẫu"), mở được
+    bằng flamegraph.pl hoặc speedscope. Chỉ tốn chi phí khi đang chạy.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common()) + "\n"
@@ -1,92 +1,265 @@
 import pdfplumber
+import io
 import re
-from typing import Dict, List
-import spacy
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
-import random
-import base64
+
+try:
+    from .blob_store import BlobStore, LocalBlobStore
+    from .metrics import PROCESSOR_STAGE_SECONDS
+    from .skill_taxonomy import SkillMatcher, get_default_matcher
+except ImportError:
+    from blob_store import BlobStore, LocalBlobStore
+    from metrics import PROCESSOR_STAGE_SECONDS
+    from skill_taxonomy import SkillMatcher, get_default_matcher
+
+
+# Tiêu đề các mục trong CV và các tên đồng nghĩa có thể gặp
+DEFAULT_SECTION_HEADERS = {
+    "Contact Information": ["Contact Information", "Contact Details", "Personal Information"],
+    "Profile": ["Profile", "Professional Summary", "Career Objective", "About Me"],
+    "Experiences": ["Experiences", "Work Experience", "Professional Experience", "Employment History"],
+    "Education": ["Education", "Academic Background"],
+    "Skills": ["Skills", "Technical Skills", "Key Skills", "Core Competencies"],
+}
+
+
+class SectionParser:
+    """
+    Tách CV thành các mục bằng một lần quét duy nhất.
+
+    Tất cả tiêu đề (kể cả tên đồng nghĩa) được gộp vào một regex biên dịch sẵn;
+    lần xuất hiện đầu tiên của mỗi mục được giữ lại và nội dung của mục là
+    phần văn bản nằm giữa tiêu đề đó và tiêu đề kế tiếp.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, List[str]]] = None):
+        self.headers = headers or DEFAULT_SECTION_HEADERS
+        self._section_of = {
+            synonym: section
+            for section, synonyms in self.headers.items()
+            for synonym in synonyms
+        }
+        # Tên dài trước để "Technical Skills" được ưu tiên hơn "Skills".
+        # Không đặt \b ở đầu pattern để re dùng được tối ưu tìm tiền tố,
+        # biên từ bên trái được kiểm tra trong parse().
+        alternatives = sorted(self._section_of, key=len, reverse=True)
+        self._header_re = re.compile(
+            r'(' + '|'.join(map(re.escape, alternatives)) + r')\b\s*:?\s*'
+        )
+
+    def parse(self, text: str) -> Dict[str, str]:
+        boundaries = []
+        seen = set()
+        for match in self._header_re.finditer(text):
+            start = match.start()
+            if start and text[start - 1].isalnum():
+                continue
+            section = self._section_of[match.group(1)]
+            if section not in seen:
+                seen.add(section)
+                boundaries.append((section, match.start(), match.end()))
+
+        sections = {}
+        for i, (section, _, content_start) in enumerate(boundaries):
+            content_end = boundaries[i + 1][1] if i + 1 < len(boundaries) else len(text)
+            sections[section] = text[content_start:content_end].strip()
+        return sections
+
+
+# Model spaCy dùng chung cho mọi Processor trong process, chỉ load khi cần
+_nlp_models = {}
+_nlp_lock = threading.Lock()
+
+
+def load_nlp(model: str = "en_core_web_sm"):
+    """Load a spaCy model on first use and share it across Processor instances."""
+    with _nlp_lock:
+        if model not in _nlp_models:
+            import spacy
+            _nlp_models[model] = spacy.load(model)
+        return _nlp_models[model]
+
+
+# Processor dùng riêng trong mỗi worker process (khởi tạo một lần bởi _init_worker)
+_worker_processor = None
+
+
+def _init_worker(blob_store: BlobStore, section_headers: Dict[str, List[str]], nlp_model: str,
+                 skill_matcher: SkillMatcher) -> None:
+    """Khởi tạo Processor một lần cho mỗi worker process (model spaCy load khi cần, dùng chung trong worker)."""
+    global _worker_processor
+    _worker_processor = Processor(blob_store=blob_store, section_headers=section_headers, nlp_model=nlp_model,
+                                  skill_matcher=skill_matcher)
+
+
+def _process_in_worker(pdf: Union[str, bytes], file_name: Optional[str] = None) -> Dict:
+    return _worker_processor.process_pdf(pdf, file_name=file_name)
+
 
 class Processor:
-    def __init__(self):
-        self.nlp = spacy.load("en_core_web_sm")
+    # Tăng khi thay đổi cách trích xuất/parse để ingest lại các file đã xử lý
+    EXTRACTION_VERSION = 3
+
+    def __init__(self, blob_store: Optional[BlobStore] = None,
+                 section_headers: Optional[Dict[str, List[str]]] = None,
+                 nlp_model: str = "en_core_web_sm", skill_matcher: Optional[SkillMatcher] = None):
+        self.nlp_model = nlp_model
+        self.skill_matcher = skill_matcher or get_default_matcher()
+        self.blob_store = blob_store or LocalBlobStore()
+        self.section_parser = SectionParser(section_headers)
         
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded lazily for NLP-based features only."""
+        return load_nlp(self.nlp_model)
+
+    def iter_pdf_pages(self, pdf_path: Union[str, BinaryIO]) -> Iterator[str]:
+        """Yield text page by page, freeing each page's layout cache once it is extracted.
+
+        pdf_path may also be a seekable binary file object (e.g. io.BytesIO).
+        """
         with pdfplumber.open(pdf_path) as pdf:
-            text = ""
             for page in pdf.pages:
-                text += page.extract_text() + "\n"
-        return text
+                # extract_text() trả về None với trang không có text (vd. trang scan)
+                text = page.extract_text() or ""
+                page.close()
+                yield text
+
+    def extract_text_from_pdf(self, pdf_path: Union[str, BinaryIO]) -> str:
+        return "\n".join(self.iter_pdf_pages(pdf_path))
     
-    def clean_text(self, text: str) -> str:
-        """Clean text by removing special characters and normalizing whitespace."""
+    def clean_text(self, text: Union[str, Iterable[str]]) -> str:
+        """Clean text by removing special characters and normalizing whitespace.
+
+        Accepts either a full string or a stream of page texts (see iter_pdf_pages),
+        in which case pages are cleaned one at a time.
+        """
+        if not isinstance(text, str):
+            return " ".join(filter(None, (self.clean_text(page) for page in text)))
         if not text:
             return ""
         # Remove special unicode characters like bullet points
-        text = re.sub(r'\uf0b7', '', text)
-        # Replace newlines with spaces
-        text = re.sub(r'\n', ' ', text)
-        # Replace multiple spaces with single space
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        text = text.replace('\uf0b7', '')
+        # Replace newlines and multiple spaces with single space (split() tách theo mọi khoảng trắng như \s+)
+        return ' '.join(text.split())
     
-    def parse_resume(self, text: str) -> Dict:
-        sections = {}
-        
-        # Find different sections in the text
-        contact_info = re.search(r'Contact Information(.*?)(?=Profile)', text, re.DOTALL)
-        profile = re.search(r'Profile(.*?)(?=Experiences)', text, re.DOTALL)
-        experiences = re.search(r'Experiences(.*?)(?=Education)', text, re.DOTALL)
-        education = re.search(r'Education(.*?)(?=Skills)', text, re.DOTALL)
-        skills = re.search(r'Skills\s*(.*?)(?=$)', text, re.DOTALL)  # Tìm từ Skills đến hết văn bản
+    def parse_resume(self, text: Union[str, Iterable[str]]) -> Dict:
+        if not isinstance(text, str):
+            # Stream các trang chưa được làm sạch
+            text = self.clean_text(text)
+        return self.section_parser.parse(text)
     
-        if skills:
-            sections['Skills'] = skills.group(1).strip()
-
-        if contact_info:
-            sections['Contact Information'] = contact_info.group(1).strip()
-        if profile:
-            sections['Profile'] = profile.group(1).strip()
-        if experiences:
-            sections['Experiences'] = experiences.group(1).strip()
-        if education:
-            sections['Education'] = education.group(1).strip()
-        if skills:
-            sections['Skills'] = skills.group(1).strip()
 
-
-        return sections
-    
-
-    def transform_sections(self, sections: Dict, pdf_path: str) -> Dict:
-        # process_pdf path
-        with open(pdf_path, "rb") as f:
-            # Đọc tệp PDF dưới dạng nhị phân và mã hóa thành base64
-            pdf_data = base64.b64encode(f.read()).decode('utf-8')
+    def transform_sections(self, sections: Dict, pdf_bytes: bytes, file_name: str) -> Dict:
+        # Lưu file PDF vào blob store, index chỉ giữ hash và kích thước
+        pdf_sha256, pdf_size = self.blob_store.put(pdf_bytes)
         transformed = {
-            "cv_id": str(random.randint(1000, 100000)),
-            "profile": sections["Profile"],
-            "skills": sections["Skills"],
-            "experience": sections["Experiences"],
-            "education": sections["Education"],
-            "contact": sections["Contact Information"],
-            "cv_data": pdf_data,
+            # Dùng hash nội dung làm id: upload lại cùng một CV sẽ không tạo bản trùng
+            "cv_id": pdf_sha256,
+            "profile": sections.get("Profile", ""),
+            "skills": sections.get("Skills", ""),
+            "experience": sections.get("Experiences", ""),
+            "education": sections.get("Education", ""),
+            "contact": sections.get("Contact Information", ""),
+            # Kỹ năng chuẩn hóa từ mục Skills và Experiences, dùng cho truy vấn term chính xác
+            "skill_ids": self.skill_matcher.match(
+                f"{sections.get('Skills', '')} {sections.get('Experiences', '')}"
+            ),
+            "cv_sha256": pdf_sha256,
+            "cv_size": pdf_size,
             "metadata": {
                 "last_updated": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
-                "file_name": pdf_path.split('/')[-1],
+                "file_name": file_name,
                 "language": "English"
             }
         }
         
         return transformed
 
-    def process_pdf(self, pdf_path: str) -> Dict:
-        """Process PDF and return JSON string."""
-        raw_text = self.extract_text_from_pdf(pdf_path)
-        cleaned_data = self.clean_text(raw_text)
-        resume = self.parse_resume(cleaned_data)
-        extract_data = self.transform_sections(resume, pdf_path)
+    def process_pdf(self, pdf: Union[str, bytes, BinaryIO], file_name: Optional[str] = None) -> Dict:
+        """
+        Process PDF and return JSON string.
+
+        pdf có thể là đường dẫn, bytes hoặc file object (vd. file upload của Flask).
+        Nội dung chỉ được đọc một lần vào bộ nhớ; pdfplumber, việc tính hash và
+        blob store dùng chung buffer đó. file_name mặc định là tên file của đường dẫn.
+        """
+        with PROCESSOR_STAGE_SECONDS.time(stage="read"):
+            if isinstance(pdf, str):
+                file_name = file_name or os.path.basename(pdf)
+                with open(pdf, "rb") as f:
+                    pdf_bytes = f.read()
+            elif isinstance(pdf, (bytes, bytearray, memoryview)):
+                pdf_bytes = bytes(pdf)
+            else:
+                pdf_bytes = pdf.read()
+        # Gom text các trang (chỉ là chuỗi, các trang pdfplumber vẫn được giải phóng dần)
+        # để đo riêng thời gian extract và clean
+        with PROCESSOR_STAGE_SECONDS.time(stage="extract"):
+            pages = list(self.iter_pdf_pages(io.BytesIO(pdf_bytes)))
+        with PROCESSOR_STAGE_SECONDS.time(stage="clean"):
+            cleaned_data = self.clean_text(pages)
+        with PROCESSOR_STAGE_SECONDS.time(stage="parse"):
+            resume = self.parse_resume(cleaned_data)
+        with PROCESSOR_STAGE_SECONDS.time(stage="encode"):
+            extract_data = self.transform_sections(resume, pdf_bytes, file_name or "CV.pdf")
         return extract_data
 
+    def create_executor(self, workers: Optional[int] = None) -> ProcessPoolExecutor:
+        """Process pool mà mỗi worker có một Processor cấu hình giống self (dùng với submit)."""
+        return ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1, initializer=_init_worker,
+                                   initargs=(self.blob_store, self.section_parser.headers, self.nlp_model,
+                                             self.skill_matcher))
+
+    def submit(self, executor: ProcessPoolExecutor, pdf: Union[str, bytes], file_name: Optional[str] = None) -> Future:
+        """Xử lý một PDF (đường dẫn hoặc bytes) trên executor tạo bởi create_executor, không chặn thread gọi."""
+        return executor.submit(_process_in_worker, pdf, file_name)
+
+    def process_many(self, pdf_paths: Iterable[str], workers: Optional[int] = None,
+                     max_pending: Optional[int] = None) -> Iterator[Tuple[str, Optional[Dict], Optional[Exception]]]:
+        """
+        Xử lý nhiều file PDF song song bằng process pool.
+
+        Kết quả được trả về ngay khi từng file xử lý xong (không theo thứ tự đầu vào)
+        dưới dạng (pdf_path, cv_data, error), nên có thể đưa thẳng vào index_cvs.
+
+        Args:
+            pdf_paths: Iterable đường dẫn PDF, có thể là generator
+            workers: Số worker process (mặc định bằng số CPU)
+            max_pending: Số file tối đa đang chờ xử lý cùng lúc (mặc định workers * 4)
+        """
+        workers = workers or os.cpu_count() or 1
+        max_pending = max_pending or workers * 4
+
+        with self.create_executor(workers) as executor:
+            pending = {}
+            paths = iter(pdf_paths)
+            exhausted = False
+            while True:
+                # Giới hạn số file đang chờ để không đọc hết generator đầu vào vào bộ nhớ
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        pdf_path = next(paths)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[executor.submit(_process_in_worker, pdf_path)] = pdf_path
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pdf_path = pending.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        yield pdf_path, None, error
+                    else:
+                        yield pdf_path, future.result(), None
+
 # if __name__ == "__main__":
 #     processor = Processor()
 #     pdf_path = 'C:\\Users\\MINH LOC\\Do an TVanTT\\search_CV\\Data\Test1\\CV2.pdf'  # Update with your actual path
@@ -0,0 +1,39 @@
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+try:
+    from .elastic_handler import MAPPING_VERSION, ElasticHandler
+except ImportError:
+    from elastic_handler import MAPPING_VERSION, ElasticHandler
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m source.reindex",
+        description="Dựng lại index CV với mapping hiện tại (MAPPING_VERSION) rồi chuyển alias, không dừng tìm kiếm."
+    )
+    parser.add_argument('--index', default='cvs', help='Tên alias đọc của index (mặc định cvs)')
+    parser.add_argument('--version', type=int, default=MAPPING_VERSION,
+                        help=f'Phiên bản index mới (mặc định MAPPING_VERSION={MAPPING_VERSION})')
+    parser.add_argument('--poll-interval', type=float, default=5.0, help='Số giây giữa các lần kiểm tra tiến độ')
+    parser.add_argument('--delete-old', action='store_true', help='Xóa index cũ sau khi chuyển alias')
+    parser.add_argument('--status', action='store_true', help='Chỉ in index và phiên bản mapping hiện tại')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    es_handler = ElasticHandler(index_name=args.index)
+    if args.status:
+        print(f"{args.index} -> {es_handler.current_index()} (mapping v{es_handler.current_version()}, "
+              f"code v{MAPPING_VERSION})")
+        return 0
+
+    new_index = es_handler.reindex(version=args.version, poll_interval=args.poll_interval,
+                                   delete_old=args.delete_old)
+    print(f"{args.index} -> {new_index}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from .file_lock import FileLock
+    from .local_search import analyze
+except ImportError:
+    from file_lock import FileLock
+    from local_search import analyze
+
+logger = logging.getLogger(__name__)
+
+# Các mục CV được embed, theo thứ tự các cột trong ma trận embedding
+SECTION_FIELDS = ("skills", "experience", "profile")
+
+# Trọng số (requirements, responsibilities) cho từng mục, giống boost trong search_cv_by_jd
+SECTION_WEIGHTS = np.array([
+    [3.0, 1.0],  # skills
+    [2.0, 3.0],  # experience
+    [1.0, 2.0],  # profile
+], dtype=np.float32)
+SECTION_WEIGHTS /= SECTION_WEIGHTS.sum(axis=0)
+
+# Thư mục embedding mặc định, cố định theo vị trí package như DEFAULT_BLOB_DIR
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "embeddings")
+
+# Embedding mới được ghi nối vào các file này (giống pending.jsonl của LocalSearchBackend);
+# embeddings.npy chỉ được ghi lại mỗi DEFAULT_FLUSH_EVERY CV hoặc khi flush()
+PENDING_VECTORS = "pending.f16"
+PENDING_IDS = "pending_ids.jsonl"
+DEFAULT_FLUSH_EVERY = 1000
+# Khóa ghi giữa các process dùng chung thư mục embedding
+LOCK_FILE = ".lock"
+
+
+class HashingEmbedder:
+    """
+    Embedding không cần model: hash các từ và trigram ký tự vào vector cố định.
+
+    Dùng khi không có model sentence-transformers trên máy; bắt được các biến thể
+    chính tả và từ chung nhưng không hiểu nghĩa như model thật.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _features(self, text: str) -> Iterable[str]:
+        for term, _, _ in analyze(text):
+            yield term
+            padded = f"#{term}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 ổn định giữa các process (khác với hash() của Python)
+                h = zlib.crc32(feature.encode('utf-8'))
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class SentenceTransformerEmbedder:
+    """Embedding bằng model sentence-transformers chạy trên CPU (model phải có sẵn trên máy)."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("sentence-transformers is required for SentenceTransformerEmbedder") from e
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def create_embedder(model_name: Optional[str] = None):
+    """Dùng model sentence-transformers nếu được cấu hình (RERANK_MODEL), ngược lại dùng HashingEmbedder."""
+    model_name = model_name or os.environ.get('RERANK_MODEL')
+    if model_name:
+        return SentenceTransformerEmbedder(model_name)
+    logger.warning("RERANK_MODEL is not set: re-ranking with HashingEmbedder (hashed words and character "
+                   "trigrams), which does not capture meaning; set RERANK_MODEL to a local "
+                   "sentence-transformers model for semantic re-ranking")
+    return HashingEmbedder()
+
+
+class EmbeddingStore:
+    """
+    Ma trận embedding float16 có dạng (số CV, số mục, dim), lưu bằng np.save.
+
+    Mỗi CV là một hàng; ids.json ánh xạ thứ tự hàng sang cv_id. CV thêm sau lần
+    save() gần nhất được ghi nối vào PENDING_VECTORS/PENDING_IDS và đọc lại khi load.
+    Nhiều process (app và CLI ingest) có thể dùng chung thư mục: ghi đĩa giữ LOCK_FILE,
+    save() gộp cả embedding process khác đã ghi và refresh() đọc lại khi đĩa thay đổi.
+    """
+
+    def __init__(self, directory: str, dim: int):
+        self.directory = directory
+        self.dim = dim
+        self._file_lock = FileLock(os.path.join(directory, LOCK_FILE))
+        with self._file_lock:
+            self._load()
+
+    def _read(self) -> Tuple[List[str], np.ndarray, List[str], np.ndarray]:
+        """Đọc (ids, ma trận) của embeddings.npy và (ids, vectors) của các file pending."""
+        row_shape = (len(SECTION_FIELDS), self.dim)
+        ids: List[str] = []
+        matrix = np.zeros((0, *row_shape), dtype=np.float16)
+        matrix_path = os.path.join(self.directory, "embeddings.npy")
+        if os.path.exists(matrix_path):
+            with open(os.path.join(self.directory, "ids.json"), 'r', encoding='utf-8') as f:
+                ids = json.load(f)
+            matrix = np.load(matrix_path)
+            if matrix.shape[2] != self.dim:
+                raise ValueError(f"Embedding dimension mismatch in {self.directory}: {matrix.shape[2]} != {self.dim}")
+
+        pending_ids: List[str] = []
+        pending_vectors = np.zeros((0, *row_shape), dtype=np.float16)
+        ids_path = os.path.join(self.directory, PENDING_IDS)
+        vectors_path = os.path.join(self.directory, PENDING_VECTORS)
+        if os.path.exists(ids_path) and os.path.exists(vectors_path):
+            with open(ids_path, 'r', encoding='utf-8') as f:
+                pending_ids = [line.strip() for line in f if line.endswith('\n')]
+            vectors = np.fromfile(vectors_path, dtype=np.float16)
+            pending_vectors = vectors[:vectors.size - vectors.size % (row_shape[0] * row_shape[1])].reshape(
+                -1, *row_shape)
+            # Vector được ghi trước id: chỉ giữ các CV có đủ cả hai (bỏ phần ghi dở khi process bị dừng)
+            count = min(len(pending_ids), len(pending_vectors))
+            pending_ids, pending_vectors = pending_ids[:count], pending_vectors[:count]
+        return ids, matrix, pending_ids, pending_vectors
+
+    def _load(self) -> None:
+        ids, matrix, pending_ids, pending_vectors = self._read()
+        self.ids = ids
+        self.rows: Dict[str, int] = {doc_id: row for row, doc_id in enumerate(ids)}
+        self.matrix = matrix
+        # Dung lượng thực của self.matrix có thể lớn hơn số CV để thêm CV không phải copy lại mỗi lần
+        self.size = len(ids)
+        # Số CV chỉ có trong file pending, chưa nằm trong embeddings.npy
+        self.pending = len(self.add(pending_ids, pending_vectors))
+        self._signature = self._disk_signature()
+
+    def _disk_signature(self) -> Tuple:
+        signature = []
+        for name in ("embeddings.npy", PENDING_IDS):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def refresh(self) -> bool:
+        """Đọc lại store nếu file trên đĩa đã đổi (vd. CLI ingest vừa thêm embedding), True nếu có đọc lại."""
+        if self._disk_signature() == self._signature:
+            return False
+        with self._file_lock:
+            self._load()
+        return True
+
+    def append_pending(self, doc_ids: List[str], vectors: np.ndarray) -> None:
+        """Ghi nối embedding của các CV vừa add() ra đĩa (không ghi lại cả ma trận)."""
+        if not doc_ids:
+            return
+        # Giữ khóa để vector và id của hai process không xen kẽ nhau
+        with self._file_lock:
+            with open(os.path.join(self.directory, PENDING_VECTORS), 'ab') as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float16).tobytes())
+            with open(os.path.join(self.directory, PENDING_IDS), 'a', encoding='utf-8') as f:
+                f.writelines(f"{doc_id}\n" for doc_id in doc_ids)
+        self.pending += len(doc_ids)
+
+    def add(self, doc_ids: List[str], vectors: np.ndarray) -> List[int]:
+        """Thêm embedding (len(doc_ids), số mục, dim) của các CV chưa có trong store, trả về vị trí các CV mới."""
+        new = [i for i, doc_id in enumerate(doc_ids) if doc_id not in self.rows]
+        if not new:
+            return new
+        needed = self.size + len(new)
+        if needed > self.matrix.shape[0]:
+            grown = np.zeros((max(needed, 2 * self.matrix.shape[0]), len(SECTION_FIELDS), self.dim), dtype=np.float16)
+            grown[:self.size] = self.matrix[:self.size]
+            self.matrix = grown
+        for i in new:
+            self.rows[doc_ids[i]] = self.size
+            self.ids.append(doc_ids[i])
+            self.matrix[self.size] = vectors[i]
+            self.size += 1
+        return new
+
+    def save(self) -> None:
+        """Ghi embeddings.npy gồm cả các CV mà process khác đã ghi ra đĩa, rồi xóa file pending."""
+        with self._file_lock:
+            ids, matrix, pending_ids, pending_vectors = self._read()
+            self.add(ids, matrix)
+            self.add(pending_ids, pending_vectors)
+            matrix_path = os.path.join(self.directory, "embeddings.npy")
+            with open(f"{matrix_path}.tmp", 'wb') as f:
+                np.save(f, self.matrix[:self.size])
+            os.replace(f"{matrix_path}.tmp", matrix_path)
+            ids_path = os.path.join(self.directory, "ids.json")
+            with open(f"{ids_path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(self.ids, f)
+            os.replace(f"{ids_path}.tmp", ids_path)
+            for name in (PENDING_IDS, PENDING_VECTORS):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+            self.pending = 0
+            self._signature = self._disk_signature()
+
+
+class Reranker:
+    """
+    Xếp hạng lại các kết quả lexical bằng độ tương đồng embedding giữa JD và từng mục của CV.
+
+    Điểm cuối = alpha * (điểm lexical / điểm lexical cao nhất) + (1 - alpha) * điểm ngữ nghĩa;
+    CV chưa có embedding chỉ dùng điểm lexical đã chuẩn hóa.
+    """
+
+    def __init__(self, store_dir: str = DEFAULT_STORE_DIR, embedder=None, alpha: float = 0.5, window: int = 200,
+                 flush_every: int = DEFAULT_FLUSH_EVERY):
+        self.embedder = embedder or create_embedder()
+        self.store = EmbeddingStore(store_dir, self.embedder.dim)
+        self.alpha = alpha
+        self.window = window
+        self.flush_every = flush_every
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def add_cvs(self, cvs: List[Dict]) -> None:
+        """Tính embedding cho từng mục của các CV (gọi lúc index) và ghi nối ra đĩa."""
+        cvs = [cv_data for cv_data in cvs if cv_data.get('cv_id') not in self.store.rows]
+        if not cvs:
+            return
+        texts = [cv_data.get(field, "") for cv_data in cvs for field in SECTION_FIELDS]
+        vectors = self.embedder.embed(texts).reshape(len(cvs), len(SECTION_FIELDS), -1)
+        doc_ids = [cv_data['cv_id'] for cv_data in cvs]
+        with self._lock:
+            new = self.store.add(doc_ids, vectors)
+            self.store.append_pending([doc_ids[i] for i in new], vectors[new])
+            if self.store.pending >= self.flush_every:
+                self.store.save()
+
+    def flush(self) -> None:
+        """Gộp các embedding trong file pending vào embeddings.npy."""
+        with self._lock:
+            if self.store.pending:
+                self.store.save()
+
+    def rerank(self, response, job_requirements: str, job_responsibilities: str,
+               size: int = 5, from_: int = 0) -> Dict:
+        """Xếp hạng lại hits của response, trả về response (dict) với trang from_/size mới."""
+        body = dict(getattr(response, 'body', response))
+        hits = list(body['hits']['hits'])
+        if hits:
+            query = self.embedder.embed([job_requirements, job_responsibilities]).T  # (dim, 2)
+            with self._lock:
+                rows = np.array([self.store.rows.get(hit['_id'], -1) for hit in hits])
+                # CV chưa có embedding có thể vừa được process khác (CLI ingest) ghi ra đĩa
+                if not (rows >= 0).all() and self.store.refresh():
+                    rows = np.array([self.store.rows.get(hit['_id'], -1) for hit in hits])
+                found = rows >= 0
+                # Một phép nhân ma trận cho toàn bộ hits: (n, mục, dim) @ (dim, 2) -> (n, mục, 2)
+                similarity = self.store.matrix[rows[found]].astype(np.float32) @ query
+            semantic = np.zeros(len(hits), dtype=np.float32)
+            semantic[found] = np.einsum('nsq,sq->n', similarity, SECTION_WEIGHTS)
+
+            lexical = np.array([hit['_score'] or 0.0 for hit in hits], dtype=np.float32)
+            lexical /= max(lexical.max(), 1e-12)
+            # CV chưa có embedding chỉ xếp theo điểm lexical (không coi điểm ngữ nghĩa là 0)
+            scores = np.where(found, self.alpha * lexical + (1 - self.alpha) * semantic, lexical)
+
+            order = np.argsort(-scores, kind='stable')
+            hits = [dict(hits[i], _score=float(scores[i])) for i in order]
+
+        body['hits'] = dict(body['hits'], hits=hits[from_:from_ + size])
+        if hits:
+            body['hits']['max_score'] = hits[0]['_score']
+        return body
@@ -0,0 +1,53 @@
+"""Giới hạn và hàm dùng chung cho API tìm kiếm của app Flask (app.py) và app ASGI (asgi_app.py)."""
+import json
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    from .elastic_handler import compact_hit
+except ImportError:
+    from elastic_handler import compact_hit
+
+# Giới hạn phân trang from/size (index.max_result_window mặc định của Elasticsearch)
+MAX_RESULT_WINDOW = 10000
+MAX_SEARCH_SIZE = 1000
+
+# Chỉ lấy các trường tham chiếu tới file PDF (cv_data chỉ có ở CV index trước khi có blob store)
+PDF_SOURCE_FIELDS = ["cv_sha256", "cv_size", "cv_data"]
+
+
+def parse_paging(data: Dict) -> Tuple[int, int]:
+    """Đọc và kiểm tra "size"/"from" của body /search, ValueError nếu không hợp lệ."""
+    try:
+        size = int(data.get('size', 5))
+        from_ = int(data.get('from', 0))
+    except (TypeError, ValueError):
+        raise ValueError('size and from must be integers')
+    if not 0 < size <= MAX_SEARCH_SIZE or from_ < 0:
+        raise ValueError(f'size must be between 1 and {MAX_SEARCH_SIZE}, from must be >= 0')
+    if from_ + size > MAX_RESULT_WINDOW:
+        raise ValueError(f'from + size must not exceed {MAX_RESULT_WINDOW}, use deep paging with search_after')
+    return size, from_
+
+
+def next_page(response: Dict, size: int, from_: int, pit_id: Optional[str]) -> Optional[Dict]:
+    """
+    Tham số để lấy trang kế tiếp từ response tìm kiếm (chưa rút gọn), None nếu đã hết kết quả.
+
+    Với deep paging, trang cuối (rỗng hoặc ít hơn size) là lúc app đóng point-in-time;
+    PIT client bỏ dở giữa chừng tự hết hạn sau keep_alive (1m) kể từ trang gần nhất.
+    """
+    hits = response['hits']['hits']
+    if len(hits) < size:
+        return None
+    if pit_id is not None:
+        return {'pit_id': response.get('pit_id') or pit_id, 'search_after': hits[-1]['sort']}
+    if from_ + size >= min(response['hits']['total']['value'], MAX_RESULT_WINDOW):
+        return None
+    return {'from': from_ + size}
+
+
+def stream_ndjson(response: Dict, next_: Optional[Dict]) -> Iterator[str]:
+    """Dòng đầu là thông tin chung (total, next), mỗi dòng sau là một hit, rút gọn khi được gửi đi."""
+    yield json.dumps({'total': response['hits']['total']['value'], 'next': next_}) + '\n'
+    for hit in response['hits']['hits']:
+        yield json.dumps(compact_hit(hit)) + '\n'
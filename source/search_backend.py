@@ -0,0 +1,148 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    from .skill_taxonomy import get_default_matcher
+except ImportError:
+    from skill_taxonomy import get_default_matcher
+
+# Điểm cộng (constant score, giống truy vấn terms) khi CV có kỹ năng trùng với JD
+SKILL_IDS_BOOST = 2.0
+
+
+class SearchBackend(ABC):
+    """
+    Interface chung cho backend tìm kiếm CV.
+
+    ElasticHandler dùng cluster Elasticsearch; LocalSearchBackend chạy hoàn toàn
+    trong process (không cần cluster), dùng cho môi trường edge, CI và tenant nhỏ.
+    Kết quả search_cv_by_jd có cùng cấu trúc với response của Elasticsearch. JD đã
+    lưu (index_jd, search_jds_by_cv) là tùy chọn: backend không hỗ trợ giữ NotImplementedError.
+    """
+
+    def __init__(self, index_name: str = "cvs"):
+        self.index_name = index_name
+        # Tăng mỗi khi index thay đổi (dùng để vô hiệu hóa cache kết quả tìm kiếm)
+        self.generation = 0
+        self._generation_lock = threading.Lock()
+        # Reranker (xem reranker.py) tùy chọn: tính embedding lúc index và xếp hạng lại kết quả
+        self.reranker = None
+        # Chuẩn hóa kỹ năng trong JD để so khớp với trường skill_ids của CV
+        self.skill_matcher = get_default_matcher()
+        # Từ vựng kỹ năng đã được chuẩn hóa qua skill_ids nên truy vấn JD mặc định khớp chính xác;
+        # FUZZY_MATCHING=1 bật lại fuzziness AUTO (chịu lỗi chính tả, nhưng chậm hơn nhiều)
+        self.fuzzy_matching = os.environ.get('FUZZY_MATCHING', '0') == '1'
+
+    def bump_generation(self) -> None:
+        # += không nguyên tử giữa các thread phục vụ request
+        with self._generation_lock:
+            self.generation += 1
+
+    def cache_stats(self) -> Dict:
+        return {'generation': self.generation}
+
+    def embed_cvs(self, cvs: List[Dict]) -> None:
+        """Tính embedding cho các CV vừa index (bỏ qua nếu không bật reranker)."""
+        if self.reranker is not None and cvs:
+            self.reranker.add_cvs(cvs)
+
+    def search_cv_by_jd_reranked(self, job_requirements: str, job_responsibilities: str,
+                                 size: int = 5, from_: int = 0) -> Dict:
+        """Lấy top-N (reranker.window) kết quả lexical rồi xếp hạng lại bằng embedding."""
+        if self.reranker is None:
+            raise ValueError("Re-ranking is not enabled for this search backend")
+        response = self.search_cv_by_jd(
+            job_requirements, job_responsibilities, size=max(self.reranker.window, from_ + size)
+        )
+        return self.reranker.rerank(response, job_requirements, job_responsibilities, size=size, from_=from_)
+
+    def flush(self) -> None:
+        """Ghi ra đĩa các thay đổi đang được giữ trong bộ nhớ (mặc định chỉ có embedding của reranker)."""
+        if self.reranker is not None:
+            self.reranker.flush()
+
+    @contextmanager
+    def bulk_load(self) -> Iterator[None]:
+        """Tối ưu index cho lần nạp dữ liệu lớn trong khối with (mặc định chỉ flush ở cuối)."""
+        try:
+            yield
+        finally:
+            self.flush()
+
+    @abstractmethod
+    def create_index(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def index_cv(self, cv_data: Dict) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def index_cvs(self, cvs: Iterable[Dict], **kwargs) -> Dict:
+        raise NotImplementedError
+
+    @abstractmethod
+    def open_point_in_time(self, keep_alive: str = "1m") -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def close_point_in_time(self, pit_id: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def search_cv_by_jd(self, job_requirements: str, job_responsibilities: str, size: int = 5, from_: int = 0,
+                        search_after: Optional[List] = None, pit_id: Optional[str] = None, keep_alive: str = "1m"):
+        raise NotImplementedError
+
+    def search_cvs_by_jds(self, jds: List[Dict], size: int = 5) -> List[Dict]:
+        """
+        Tìm CV cho nhiều JD ({"requirements", "responsibilities"}), kết quả theo thứ tự jds.
+
+        Mặc định tìm lần lượt từng JD; JD bị lỗi trả về {"error": ...}.
+        """
+        results = []
+        for jd in jds:
+            try:
+                results.append(self.search_cv_by_jd(
+                    str(jd.get('requirements', '')), str(jd.get('responsibilities', '')), size=size
+                ))
+            except Exception as e:
+                results.append({'error': str(e)})
+        return results
+
+    def index_jd(self, jd: Dict) -> str:
+        raise NotImplementedError
+
+    def search_jds_by_cv(self, doc_id: str, size: int = 5):
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_document(self, index, doc_id, source_includes: Optional[List[str]] = None):
+        """Lấy document theo id (None nếu không có); source_includes giới hạn các trường của _source."""
+        raise NotImplementedError
+
+
+def create_search_backend(kind: Optional[str] = None, **kwargs) -> SearchBackend:
+    """
+    Tạo backend theo tên ("elastic" hoặc "local"), mặc định đọc từ biến môi trường SEARCH_BACKEND.
+
+    Backend local lưu dữ liệu trong thư mục LOCAL_INDEX_DIR (mặc định source/local_index).
+    """
+    kind = kind or os.environ.get('SEARCH_BACKEND', 'elastic')
+    if kind == 'elastic':
+        try:
+            from .elastic_handler import ElasticHandler
+        except ImportError:
+            from elastic_handler import ElasticHandler
+        return ElasticHandler(**kwargs)
+    if kind == 'local':
+        try:
+            from .local_search import DEFAULT_INDEX_DIR, LocalSearchBackend
+        except ImportError:
+            from local_search import DEFAULT_INDEX_DIR, LocalSearchBackend
+        kwargs.setdefault('index_dir', os.environ.get('LOCAL_INDEX_DIR', DEFAULT_INDEX_DIR))
+        return LocalSearchBackend(**kwargs)
+    raise ValueError(f"Unknown search backend: {kind}")
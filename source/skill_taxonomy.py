@@ -0,0 +1,87 @@
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.json")
+
+# Giữ nguyên "c++", "c#", "node.js" như một token; "/" và "-" tách token ("CI/CD" -> "ci", "cd")
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*', re.IGNORECASE)
+
+# Đánh dấu node kết thúc một alias trong trie
+_END = ''
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _tokenize_keep_case(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text or "")
+
+
+class SkillMatcher:
+    """
+    Chuẩn hóa tên kỹ năng về id trong taxonomy (vd. "MS Excel", "Excel" -> "excel").
+
+    Chỉ các alias trong taxonomy được đưa vào một trie theo token ("name" chỉ để
+    hiển thị: tên như "Go" hay "Less" là từ thông dụng nên không được dùng để so khớp).
+    Alias trong "case_sensitive" (vd. "React", "REST", "Excel") chỉ khớp khi viết đúng
+    hoa/thường, để "react quickly", "the rest of", "excel at" không bị nhận là kỹ năng.
+    match() quét văn bản một lần và lấy alias dài nhất khớp tại mỗi vị trí.
+    """
+
+    def __init__(self, taxonomy: Dict[str, Dict]):
+        self.taxonomy = taxonomy
+        self._trie: Dict = {}
+        for skill_id, skill in taxonomy.items():
+            case_sensitive = set(skill.get('case_sensitive', []))
+            for alias in skill.get('aliases', []):
+                tokens = tokenize(alias)
+                if not tokens:
+                    continue
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                # (id, các token phải khớp đúng hoa/thường hoặc None)
+                node[_END] = (skill_id, _tokenize_keep_case(alias) if alias in case_sensitive else None)
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_TAXONOMY_PATH) -> "SkillMatcher":
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def match(self, text: str) -> List[str]:
+        """Trả về danh sách id kỹ năng (không trùng, theo thứ tự xuất hiện) trong văn bản."""
+        original = _tokenize_keep_case(text)
+        tokens = [token.lower() for token in original]
+        found: Dict[str, None] = {}
+        i = 0
+        while i < len(tokens):
+            node = self._trie
+            matched_id, matched_end = None, i
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                if _END in node:
+                    skill_id, exact = node[_END]
+                    if exact is None or original[i:j + 1] == exact:
+                        matched_id, matched_end = skill_id, j + 1
+            if matched_id is not None:
+                found[matched_id] = None
+                i = matched_end
+            else:
+                i += 1
+        return list(found)
+
+
+_default_matcher: Optional[SkillMatcher] = None
+
+
+def get_default_matcher() -> SkillMatcher:
+    """SkillMatcher dùng taxonomy mặc định (SKILL_TAXONOMY hoặc skill_taxonomy.json), load một lần."""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = SkillMatcher.from_file(os.environ.get('SKILL_TAXONOMY', DEFAULT_TAXONOMY_PATH))
+    return _default_matcher
@@ -1,21 +1,12 @@
 from source.pdf_processor import Processor
 from source.elastic_handler import ElasticHandler
-import os 
 
 # Initialize components
 processor = Processor()
 elastic = ElasticHandler()
 
-# pdf_directory = './Data/Test1/'
-
-# for filename in os.listdir(pdf_directory):
-#     if filename.endswith('.pdf'):
-#         # Construct the full path to the PDF file
-#         pdf_path = os.path.join(pdf_directory, filename)
-        
-#         # Index data
-#         cv_data = processor.process_pdf(pdf_path)
-#         doc_id = elastic.index_cv(cv_data)
+# Index data bằng CLI (chỉ parse lại file mới hoặc đã thay đổi, parse song song, tiến độ/ETA):
+#     python -m source.ingest ./Data/
         
 
 #Thông tin từ JD với một số lỗi chính tả cố ý
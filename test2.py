@@ -26,4 +26,4 @@ pdf_path = './Data/Test1/CV1.pdf'
 cv_data = processor.process_pdf(pdf_path)
 # doc_id = elastic.index_cv(cv_data)
 
-print(cv_data["cv_data"])
\ No newline at end of file
+print(cv_data["cv_sha256"], cv_data["cv_size"])
\ No newline at end of file
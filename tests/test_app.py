@@ -0,0 +1,94 @@
+import base64
+import importlib
+import os
+import sys
+
+import pytest
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source")
+PDF = b"%PDF-1.4 " + bytes(range(256)) * 4
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    """Import source/app.py (import phẳng như khi chạy từ source/) với backend local và thư mục tạm."""
+    tmp = tmp_path_factory.mktemp("app")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.syspath_prepend(SOURCE_DIR)
+        mp.chdir(tmp)
+        mp.setenv("SEARCH_BACKEND", "local")
+        mp.setenv("LOCAL_INDEX_DIR", str(tmp / "index"))
+        mp.setenv("CV_BLOB_DIR", str(tmp / "blobs"))
+        mp.setenv("JOBS_DB", str(tmp / "jobs.db"))
+        mp.delenv("RERANK", raising=False)
+        module = importlib.import_module("app")
+        yield module
+        module.es_handler.close()
+        sys.modules.pop("app", None)
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    sha256, size = app_module.blob_store.put(PDF)
+    documents = {
+        "blob": {"_source": {"cv_sha256": sha256, "cv_size": size}},
+        "legacy": {"_source": {"cv_data": base64.b64encode(PDF).decode()}},
+    }
+    monkeypatch.setattr(app_module.es_handler, "get_document",
+                        lambda index, doc_id, source_includes=None: documents.get(doc_id))
+    return app_module.app.test_client(), sha256
+
+
+def test_pdf_is_sent_with_etag(client):
+    client, sha256 = client
+
+    response = client.get("/pdf/blob")
+
+    assert response.status_code == 200
+    assert response.data == PDF
+    assert response.headers["ETag"] == f'"{sha256}"'
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["Content-Disposition"].startswith("attachment")
+
+
+def test_matching_etag_returns_304(client):
+    client, sha256 = client
+
+    response = client.get("/view_pdf/blob", headers={"If-None-Match": f'"{sha256}"'})
+
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_range_request_returns_partial_content(client):
+    client, _ = client
+
+    response = client.get("/pdf/blob", headers={"Range": "bytes=10-19"})
+
+    assert response.status_code == 206
+    assert response.data == PDF[10:20]
+    assert response.headers["Content-Range"] == f"bytes 10-19/{len(PDF)}"
+
+
+def test_unsatisfiable_range_returns_416(client):
+    client, _ = client
+
+    response = client.get("/pdf/blob", headers={"Range": f"bytes={len(PDF) + 10}-"})
+
+    assert response.status_code == 416
+
+
+def test_legacy_base64_pdf_supports_ranges_without_etag(client):
+    client, _ = client
+
+    response = client.get("/pdf/legacy", headers={"Range": "bytes=0-3"})
+
+    assert response.status_code == 206
+    assert response.data == PDF[:4]
+    assert "ETag" not in response.headers
+
+
+def test_missing_cv_returns_404(client):
+    client, _ = client
+
+    assert client.get("/pdf/missing").status_code == 404
@@ -0,0 +1,52 @@
+import importlib
+import os
+import sys
+
+import pytest
+from starlette.testclient import TestClient
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "source")
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    """Import source/asgi_app.py (import phẳng như khi chạy từ source/) với backend local và thư mục tạm."""
+    tmp = tmp_path_factory.mktemp("asgi_app")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.syspath_prepend(SOURCE_DIR)
+        mp.setenv("SEARCH_BACKEND", "local")
+        mp.setenv("LOCAL_INDEX_DIR", str(tmp / "index"))
+        mp.setenv("CV_BLOB_DIR", str(tmp / "blobs"))
+        mp.setenv("PARSE_WORKERS", "1")
+        mp.delenv("RERANK", raising=False)
+        module = importlib.import_module("asgi_app")
+        with TestClient(module.app) as client:
+            yield client
+        module.es_handler.close()
+        sys.modules.pop("asgi_app", None)
+
+
+@pytest.mark.parametrize("body", ["[]", '"Python"', "null"])
+def test_search_rejects_json_that_is_not_an_object(client, body):
+    response = client.post("/search", content=body, headers={"Content-Type": "application/json"})
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "JSON body must be an object"}
+
+
+def test_search_accepts_json_object(client):
+    response = client.post("/search", json={"requirements": "Python"})
+
+    assert response.status_code == 200
+    assert response.json()["hits"] == []
+
+
+def test_malformed_pdf_is_reported_per_file(client):
+    files = [("files[]", ("broken.pdf", b"not a pdf", "application/pdf"))]
+
+    response = client.post("/upload", files=files)
+
+    assert response.status_code == 200
+    [result] = response.json()["processed_files"]
+    assert result["filename"] == "broken.pdf"
+    assert result["status"] == "error"
@@ -0,0 +1,190 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from source.elastic_handler import ElasticHandler
+
+
+def make_handler():
+    client = MagicMock()
+    client.options.return_value = client
+    return ElasticHandler(client=client), client
+
+
+def fake_streaming_bulk(statuses, sent):
+    """streaming_bulk giả: trả về kết quả theo mã trạng thái của từng id (mặc định 201)."""
+    def streaming_bulk(client, actions, **kwargs):
+        for action in actions:
+            sent.append(action)
+            status = statuses.get(action['_id'], 201)
+            result = {'_id': action['_id'], 'status': status}
+            if status >= 300:
+                result['error'] = {'type': 'error', 'status': status}
+            yield status < 300, {'create': result}
+    return streaming_bulk
+
+
+def test_index_cvs_classifies_bulk_results(monkeypatch):
+    handler, client = make_handler()
+    sent = []
+    monkeypatch.setattr("source.elastic_handler.streaming_bulk",
+                        fake_streaming_bulk({"old": 409, "bad": 400}, sent))
+    generation = handler.generation
+
+    summary = handler.index_cvs([{"cv_id": "new"}, {"cv_id": "old"}, {"cv_id": "bad"}, {"skills": "no id"}])
+
+    assert summary["indexed"] == ["new"]
+    assert summary["skipped"] == ["old"]
+    assert [(e["id"], e["status"]) for e in summary["errors"]] == [("bad", 400), (None, None)]
+    assert {a["_op_type"] for a in sent} == {"create"}
+    assert {a["_index"] for a in sent} == {handler.write_alias}
+    client.indices.refresh.assert_called_once_with(index=handler.write_alias)
+    assert handler.generation > generation
+
+
+def test_index_cvs_without_new_documents_keeps_cache(monkeypatch):
+    handler, client = make_handler()
+    monkeypatch.setattr("source.elastic_handler.streaming_bulk", fake_streaming_bulk({"old": 409}, []))
+    generation = handler.generation
+
+    summary = handler.index_cvs([{"cv_id": "old"}])
+
+    assert summary == {"indexed": [], "skipped": ["old"], "errors": []}
+    client.indices.refresh.assert_not_called()
+    assert handler.generation == generation
+
+
+def make_reindex_handler(failed_tasks=()):
+    """Handler với alias cvs -> cvs_v1; task _reindex trong failed_tasks kết thúc với lỗi."""
+    handler, client = make_handler()
+    client.indices.exists_alias.return_value = True
+    client.indices.get_alias.return_value.body = {"cvs_v1": {"aliases": {"cvs": {}}}}
+    tasks = iter(["copy", "rollback"])
+    client.reindex.side_effect = lambda **kwargs: {"task": next(tasks)}
+
+    def get_task(task_id):
+        failures = [{"cause": "mapper_parsing_exception"}] if task_id in failed_tasks else []
+        return {"completed": True, "task": {"status": {"created": 1, "total": 1}}, "response": {"failures": failures}}
+    client.tasks.get.side_effect = get_task
+    return handler, client
+
+
+def alias_actions(client):
+    return [call.kwargs["actions"] for call in client.indices.update_aliases.call_args_list]
+
+
+def test_reindex_moves_write_then_read_alias():
+    handler, client = make_reindex_handler()
+
+    assert handler.reindex(version=2, poll_interval=0) == "cvs_v2"
+
+    assert client.indices.create.call_args.kwargs["index"] == "cvs_v2"
+    assert client.reindex.call_args.kwargs["dest"] == {"index": "cvs_v2", "op_type": "create"}
+    assert alias_actions(client) == [
+        [{"remove": {"index": "cvs_v1", "alias": "cvs_write"}},
+         {"add": {"index": "cvs_v2", "alias": "cvs_write", "is_write_index": True}}],
+        [{"remove": {"index": "cvs_v1", "alias": "cvs"}},
+         {"add": {"index": "cvs_v2", "alias": "cvs"}}],
+    ]
+    client.indices.delete.assert_not_called()
+
+
+def test_failed_copy_rolls_back_to_old_index():
+    handler, client = make_reindex_handler(failed_tasks={"copy"})
+
+    with pytest.raises(RuntimeError, match="failed"):
+        handler.reindex(version=2, poll_interval=0)
+
+    client.tasks.cancel.assert_called_once_with(task_id="copy")
+    assert alias_actions(client)[-1] == [
+        {"remove": {"index": "cvs_v2", "alias": "cvs_write"}},
+        {"add": {"index": "cvs_v1", "alias": "cvs_write", "is_write_index": True}},
+    ]
+    assert client.reindex.call_args.kwargs["source"] == {"index": "cvs_v2"}
+    assert client.reindex.call_args.kwargs["dest"] == {"index": "cvs_v1", "op_type": "create"}
+    client.indices.delete.assert_called_once_with(index="cvs_v2")
+
+
+def test_failed_alias_swap_rolls_back_to_old_index():
+    handler, client = make_reindex_handler()
+
+    def update_aliases(actions):
+        if any(action.get("add", {}).get("alias") == "cvs" for action in actions):
+            raise RuntimeError("swap failed")
+    client.indices.update_aliases.side_effect = update_aliases
+
+    with pytest.raises(RuntimeError, match="swap failed"):
+        handler.reindex(version=2, poll_interval=0)
+
+    assert alias_actions(client)[-1][-1] == {"add": {"index": "cvs_v1", "alias": "cvs_write", "is_write_index": True}}
+    client.indices.delete.assert_called_once_with(index="cvs_v2")
+
+
+def test_incomplete_rollback_keeps_new_index():
+    handler, client = make_reindex_handler(failed_tasks={"copy", "rollback"})
+
+    with pytest.raises(RuntimeError):
+        handler.reindex(version=2, poll_interval=0)
+
+    client.indices.delete.assert_not_called()
+
+
+def test_reindex_to_current_version_is_refused():
+    handler, client = make_reindex_handler()
+
+    with pytest.raises(ValueError):
+        handler.reindex(version=1, poll_interval=0)
+
+    client.indices.create.assert_not_called()
+
+
+def make_msearch_handler():
+    handler, client = make_handler()
+    client.search.side_effect = lambda **kwargs: {"hits": {"total": {"value": 0}, "hits": []}}
+
+    def msearch(searches):
+        responses = []
+        for body in searches[1::2]:
+            if "Cobol" in str(body):
+                responses.append({"error": {"type": "search_phase_execution_exception"}, "status": 400})
+            else:
+                responses.append({"hits": {"total": {"value": 0}, "hits": []}, "status": 200})
+        return {"responses": responses}
+    client.msearch.side_effect = msearch
+    return handler, client
+
+
+def test_search_cvs_by_jds_uses_one_msearch():
+    handler, client = make_msearch_handler()
+    jds = [{"requirements": "Python"}, {"requirements": "Java", "responsibilities": "APIs"}]
+
+    results = handler.search_cvs_by_jds(jds, size=3)
+
+    assert client.msearch.call_count == 1
+    searches = client.msearch.call_args.kwargs["searches"]
+    assert searches[0::2] == [{"index": "cvs"}, {"index": "cvs"}]
+    assert searches[1::2] == [handler.build_jd_search("Python", "", 3), handler.build_jd_search("Java", "APIs", 3)]
+    assert all("hits" in result for result in results)
+
+
+def test_search_cvs_by_jds_reuses_cached_results():
+    handler, client = make_msearch_handler()
+    cached = handler.search_cv_by_jd("Python", "", size=3)
+
+    results = handler.search_cvs_by_jds([{"requirements": "Python"}, {"requirements": "Java"}], size=3)
+
+    assert results[0] is cached
+    assert len(client.msearch.call_args.kwargs["searches"]) == 2
+    handler.search_cvs_by_jds([{"requirements": "Python"}, {"requirements": "Java"}], size=3)
+    assert client.msearch.call_count == 1
+
+
+def test_search_cvs_by_jds_reports_errors_per_jd():
+    handler, client = make_msearch_handler()
+
+    results = handler.search_cvs_by_jds([{"requirements": "Cobol"}, {"requirements": "Python"}])
+
+    assert results[0] == {"error": {"type": "search_phase_execution_exception"}}
+    assert "hits" in results[1]
+    handler.search_cvs_by_jds([{"requirements": "Cobol"}])
+    assert client.msearch.call_count == 2
@@ -0,0 +1,68 @@
+import json
+import os
+
+from source.ingest_manifest import IngestManifest
+
+
+def write_pdf(path, data=b"%PDF-1.4 cv"):
+    path.write_bytes(data)
+    return str(path), os.stat(path)
+
+
+def test_unknown_file_is_changed(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), extraction_version=1)
+    pdf_path, stat = write_pdf(tmp_path / "a.pdf")
+
+    assert manifest.get(pdf_path) is None
+    assert not manifest.is_unchanged(pdf_path, stat)
+
+
+def test_recorded_file_is_unchanged_until_modified(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), extraction_version=1)
+    pdf_path, stat = write_pdf(tmp_path / "a.pdf")
+    manifest.record(pdf_path, stat, "sha")
+
+    assert manifest.is_unchanged(pdf_path, stat)
+
+    _, new_stat = write_pdf(tmp_path / "a.pdf", b"%PDF-1.4 updated cv")
+    assert not manifest.is_unchanged(pdf_path, new_stat)
+
+
+def test_touched_file_keeps_content_match(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), extraction_version=1)
+    pdf_path, stat = write_pdf(tmp_path / "a.pdf")
+    manifest.record(pdf_path, stat, "sha")
+    os.utime(pdf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert not manifest.is_unchanged(pdf_path, os.stat(pdf_path))
+    assert manifest.has_content(pdf_path, "sha")
+    assert not manifest.has_content(pdf_path, "other")
+
+
+def test_new_extraction_version_reprocesses_files(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    pdf_path, stat = write_pdf(tmp_path / "a.pdf")
+    manifest = IngestManifest(path, extraction_version=1)
+    manifest.record(pdf_path, stat, "sha")
+    manifest.save()
+
+    upgraded = IngestManifest(path, extraction_version=2)
+
+    assert not upgraded.is_unchanged(pdf_path, stat)
+    assert not upgraded.has_content(pdf_path, "sha")
+
+
+def test_save_and_reload(tmp_path):
+    path = str(tmp_path / "state" / "manifest.json")
+    pdf_path, stat = write_pdf(tmp_path / "a.pdf")
+    manifest = IngestManifest(path, extraction_version=1)
+    manifest.record(pdf_path, stat, "sha")
+    manifest.save()
+
+    reloaded = IngestManifest(path, extraction_version=1)
+
+    assert reloaded.is_unchanged(pdf_path, stat)
+    assert reloaded.get(os.path.relpath(pdf_path))["sha256"] == "sha"
+    with open(path, encoding="utf-8") as f:
+        assert list(json.load(f)) == [os.path.abspath(pdf_path)]
+    assert os.listdir(os.path.dirname(path)) == ["manifest.json"]
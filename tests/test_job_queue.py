@@ -0,0 +1,142 @@
+import sqlite3
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from source.job_queue import IngestWorkerPool, JobQueue
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("source.job_queue.time.time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def test_claims_files_in_order_until_empty(db_path):
+    queue = JobQueue(db_path)
+    job_id = queue.create_job([("a.pdf", "/tmp/a.pdf"), ("b.pdf", "/tmp/b.pdf")])
+
+    first = queue.claim_next()
+    second = queue.claim_next()
+
+    assert (first["filename"], second["filename"]) == ("a.pdf", "b.pdf")
+    assert first["job_id"] == job_id
+    assert queue.claim_next() is None
+    assert queue.get_job(job_id)["status"] == "running"
+
+
+def test_job_completes_with_success_and_error(db_path):
+    queue = JobQueue(db_path)
+    job_id = queue.create_job([("a.pdf", "/tmp/a.pdf"), ("b.pdf", "/tmp/b.pdf")])
+    queue.complete(queue.claim_next()["id"], "cv-a")
+    queue.fail(queue.claim_next()["id"], "not a PDF")
+
+    job = queue.get_job(job_id)
+
+    assert job["status"] == "completed"
+    assert job["progress"] == {"pending": 0, "processing": 0, "success": 1, "error": 1}
+    assert [(f["doc_id"], f["error"]) for f in job["files"]] == [("cv-a", None), (None, "not a PDF")]
+    assert queue.get_job("missing") is None
+
+
+def test_live_claims_are_not_requeued_by_another_process(db_path, clock):
+    worker = JobQueue(db_path, lease_seconds=60)
+    other = JobQueue(db_path, lease_seconds=60)
+    worker.create_job([("a.pdf", "/tmp/a.pdf")])
+    worker.claim_next()
+
+    assert other.requeue_interrupted() == 0
+    assert other.claim_next() is None
+
+
+def test_expired_claims_are_requeued(db_path, clock):
+    worker = JobQueue(db_path, lease_seconds=60)
+    other = JobQueue(db_path, lease_seconds=60)
+    worker.create_job([("a.pdf", "/tmp/a.pdf")])
+    claimed = worker.claim_next()
+
+    clock[0] += 61
+
+    assert other.requeue_interrupted() == 1
+    assert other.claim_next()["id"] == claimed["id"]
+
+
+def test_expired_claims_can_be_reclaimed_directly(db_path, clock):
+    worker = JobQueue(db_path, lease_seconds=60)
+    other = JobQueue(db_path, lease_seconds=60)
+    worker.create_job([("a.pdf", "/tmp/a.pdf")])
+    claimed = worker.claim_next()
+
+    clock[0] += 61
+
+    assert other.claim_next()["id"] == claimed["id"]
+
+
+def test_renew_keeps_the_claim(db_path, clock):
+    worker = JobQueue(db_path, lease_seconds=60)
+    other = JobQueue(db_path, lease_seconds=60)
+    worker.create_job([("a.pdf", "/tmp/a.pdf")])
+    claimed = worker.claim_next()
+
+    clock[0] += 50
+    worker.renew([claimed["id"]])
+    other.renew([claimed["id"]])
+    clock[0] += 50
+
+    assert other.requeue_interrupted() == 0
+
+
+def test_claims_left_by_an_older_schema_are_requeued(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE jobs (id TEXT PRIMARY KEY, created_at TEXT NOT NULL);
+        CREATE TABLE job_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT NOT NULL, filename TEXT NOT NULL,
+            path TEXT NOT NULL, status TEXT NOT NULL, doc_id TEXT, error TEXT, updated_at TEXT NOT NULL
+        );
+        INSERT INTO jobs VALUES ('old', '2024-01-01T00:00:00');
+        INSERT INTO job_files (job_id, filename, path, status, updated_at)
+            VALUES ('old', 'a.pdf', '/tmp/a.pdf', 'processing', '2024-01-01T00:00:00');
+    """)
+    conn.close()
+
+    queue = JobQueue(db_path)
+
+    assert queue.requeue_interrupted() == 1
+    assert queue.claim_next()["filename"] == "a.pdf"
+
+
+def test_worker_pool_processes_and_removes_uploads(db_path, tmp_path):
+    upload_dir = tmp_path / "upload"
+    upload_dir.mkdir()
+    good, bad = upload_dir / "good.pdf", upload_dir / "bad.pdf"
+    good.write_bytes(b"%PDF")
+    bad.write_bytes(b"%PDF")
+    processor = MagicMock()
+    processor.process_pdf.side_effect = lambda path: {"cv_id": path}
+    es_handler = MagicMock()
+    es_handler.index_cv.side_effect = lambda cv: "doc" if cv["cv_id"] == str(good) else 1 / 0
+    queue = JobQueue(db_path)
+    job_id = queue.create_job([("good.pdf", str(good)), ("bad.pdf", str(bad))])
+
+    pool = IngestWorkerPool(queue, processor, es_handler, workers=1, poll_interval=0.01)
+    pool.start()
+    try:
+        for _ in range(500):
+            if queue.get_job(job_id)["status"] == "completed":
+                break
+            time.sleep(0.01)
+    finally:
+        pool.stop()
+
+    job = queue.get_job(job_id)
+    assert job["progress"]["success"] == 1
+    assert job["progress"]["error"] == 1
+    assert not good.exists() and not bad.exists()
@@ -0,0 +1,158 @@
+import os
+
+import pytest
+
+from source.local_search import PENDING_LOG, LocalSearchBackend
+from source.skill_taxonomy import get_default_matcher
+
+
+def make_cv(cv_id, skills, experience="", profile=""):
+    # skill_ids được Processor điền từ mục Skills
+    return {
+        "cv_id": cv_id,
+        "skills": skills,
+        "skill_ids": get_default_matcher().match(skills),
+        "experience": experience,
+        "profile": profile,
+        "metadata": {"name": cv_id},
+    }
+
+
+CVS = [
+    make_cv("python-dev", "Python, Django, PostgreSQL", "Built REST APIs with Django", "Backend developer"),
+    make_cv("java-dev", "Java, Spring Boot, MySQL", "Maintained payment services", "Backend engineer"),
+    make_cv("frontend-dev", "JavaScript, React, CSS", "Built dashboards in React", "Frontend developer"),
+    make_cv("accountant", "Excel, Tally, QuickBooks", "Prepared financial reports", "Junior accountant"),
+    make_cv("data-dev", "Python, Spark, SQL", "Built data pipelines", "Data engineer"),
+]
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = LocalSearchBackend(str(tmp_path / "index"))
+    backend.index_cvs(CVS)
+    yield backend
+    backend.close()
+
+
+def hit_ids(response):
+    return [hit["_id"] for hit in response["hits"]["hits"]]
+
+
+def test_search_ranks_matching_skills_first(backend):
+    response = backend.search_cv_by_jd("Python developer", "Build APIs", size=3)
+
+    ids = hit_ids(response)
+    assert ids[0] == "python-dev"
+    assert "data-dev" in ids
+    assert "accountant" not in ids
+    assert response["hits"]["total"]["value"] == len(ids)
+    assert "python" in response["hits"]["hits"][0]["highlight"]["skills"][0].lower()
+
+
+def test_index_cv_skips_existing_id(backend):
+    generation = backend.generation
+
+    backend.index_cv(make_cv("python-dev", "Cobol"))
+
+    assert backend.generation == generation
+    assert backend.get_document(backend.index_name, "python-dev")["_source"]["skills"].startswith("Python")
+
+
+def test_get_document_filters_source_and_handles_missing(backend):
+    document = backend.get_document(backend.index_name, "accountant", source_includes=["skills"])
+
+    assert document["_source"] == {"skills": "Excel, Tally, QuickBooks"}
+    assert backend.get_document(backend.index_name, "missing") is None
+
+
+def test_from_size_paging_covers_all_hits_once(backend):
+    full = hit_ids(backend.search_cv_by_jd("Python Java React Excel Spark", "", size=10))
+    assert len(full) == len(CVS)
+    pages = [
+        hit_ids(backend.search_cv_by_jd("Python Java React Excel Spark", "", size=2, from_=from_))
+        for from_ in range(0, len(full), 2)
+    ]
+
+    assert [doc_id for page in pages for doc_id in page] == full
+
+
+def test_search_after_paging_covers_all_hits_once(backend):
+    full = hit_ids(backend.search_cv_by_jd("Python Java React Excel Spark", "", size=10))
+    assert len(full) == len(CVS)
+    pit_id = backend.open_point_in_time()
+    seen = []
+    search_after = None
+    while True:
+        response = backend.search_cv_by_jd("Python Java React Excel Spark", "", size=2,
+                                           search_after=search_after, pit_id=pit_id)
+        hits = response["hits"]["hits"]
+        seen.extend(hit["_id"] for hit in hits)
+        if len(hits) < 2:
+            break
+        search_after = hits[-1]["sort"]
+
+    assert seen == full
+
+
+def test_index_persists_and_reloads(tmp_path, backend):
+    backend.flush()
+    expected = hit_ids(backend.search_cv_by_jd("Python", "", size=5))
+    backend.close()
+
+    reloaded = LocalSearchBackend(backend.index_dir)
+
+    assert expected
+    assert hit_ids(reloaded.search_cv_by_jd("Python", "", size=5)) == expected
+
+
+def test_pending_cvs_survive_restart_without_flush(tmp_path):
+    index_dir = str(tmp_path / "index")
+    backend = LocalSearchBackend(index_dir, flush_every=100)
+    backend.index_cv(CVS[0])
+    backend.index_cv(CVS[2])
+    assert os.path.exists(os.path.join(index_dir, PENDING_LOG))
+    backend.close()
+
+    reloaded = LocalSearchBackend(index_dir)
+
+    assert hit_ids(reloaded.search_cv_by_jd("React", "", size=5)) == ["frontend-dev"]
+    assert reloaded.get_document(reloaded.index_name, "python-dev") is not None
+
+
+def test_index_cv_flushes_every_n_cvs(tmp_path):
+    index_dir = str(tmp_path / "index")
+    backend = LocalSearchBackend(index_dir, flush_every=2)
+
+    backend.index_cv(CVS[0])
+    backend.index_cv(CVS[1])
+
+    assert not os.path.exists(os.path.join(index_dir, PENDING_LOG))
+
+
+def test_bulk_load_flushes_once_at_the_end(tmp_path):
+    index_dir = str(tmp_path / "index")
+    backend = LocalSearchBackend(index_dir, flush_every=1)
+
+    with backend.bulk_load():
+        for cv in CVS:
+            backend.index_cv(cv)
+        assert os.path.exists(os.path.join(index_dir, PENDING_LOG))
+
+    assert not os.path.exists(os.path.join(index_dir, PENDING_LOG))
+    backend.close()
+    assert len(hit_ids(LocalSearchBackend(index_dir).search_cv_by_jd("Python Java React", "", size=10))) == 4
+
+
+def test_second_writer_is_refused(backend):
+    with pytest.raises(RuntimeError, match="already open"):
+        LocalSearchBackend(backend.index_dir)
+
+
+def test_save_after_reload_replaces_mapped_files(tmp_path, backend):
+    backend.flush()
+    backend.index_cv(make_cv("go-dev", "Golang, Kubernetes"))
+    backend.flush()
+
+    assert hit_ids(backend.search_cv_by_jd("Golang", "", size=5)) == ["go-dev"]
+    assert hit_ids(backend.search_cv_by_jd("Django", "", size=5)) == ["python-dev"]
@@ -0,0 +1,59 @@
+import numpy as np
+
+from source.reranker import EmbeddingStore, HashingEmbedder, Reranker
+
+
+def make_cv(cv_id, skills):
+    return {"cv_id": cv_id, "skills": skills, "experience": "", "profile": ""}
+
+
+def make_response(*scored_ids):
+    hits = [{"_id": doc_id, "_score": score, "_source": {}} for doc_id, score in scored_ids]
+    return {"hits": {"total": {"value": len(hits), "relation": "eq"}, "max_score": None, "hits": hits}}
+
+
+def test_hits_without_embedding_keep_their_lexical_score(tmp_path):
+    reranker = Reranker(store_dir=str(tmp_path), embedder=HashingEmbedder())
+    reranker.add_cvs([make_cv("embedded", "accounting excel")])
+
+    body = reranker.rerank(make_response(("embedded", 1.0), ("missing", 1.0)), "python developer", "", size=2)
+
+    scores = {hit["_id"]: hit["_score"] for hit in body["hits"]["hits"]}
+    assert scores["missing"] == 1.0
+    assert scores["embedded"] < 1.0
+
+
+def test_rerank_orders_by_semantic_similarity(tmp_path):
+    reranker = Reranker(store_dir=str(tmp_path), embedder=HashingEmbedder(), alpha=0.0)
+    reranker.add_cvs([make_cv("accountant", "accounting excel tally"), make_cv("developer", "python django")])
+
+    body = reranker.rerank(make_response(("accountant", 2.0), ("developer", 1.0)), "python django", "", size=2)
+
+    assert [hit["_id"] for hit in body["hits"]["hits"]] == ["developer", "accountant"]
+
+
+def test_embeddings_written_by_another_process_are_picked_up(tmp_path):
+    app = Reranker(store_dir=str(tmp_path), embedder=HashingEmbedder(), alpha=0.0)
+    cli = Reranker(store_dir=str(tmp_path), embedder=HashingEmbedder(), alpha=0.0)
+    cli.add_cvs([make_cv("from-cli", "python django")])
+    cli.flush()
+
+    body = app.rerank(make_response(("from-cli", 1.0)), "python django", "", size=1)
+
+    assert "from-cli" in app.store.rows
+    assert body["hits"]["hits"][0]["_score"] > 0.5
+
+
+def test_save_keeps_rows_written_by_another_store(tmp_path):
+    first = EmbeddingStore(str(tmp_path), dim=4)
+    second = EmbeddingStore(str(tmp_path), dim=4)
+    vectors = np.ones((1, 3, 4), dtype=np.float16)
+    first.add(["a"], vectors)
+    first.append_pending(["a"], vectors)
+    second.add(["b"], vectors)
+    second.append_pending(["b"], vectors)
+
+    second.save()
+    first.save()
+
+    assert sorted(EmbeddingStore(str(tmp_path), dim=4).ids) == ["a", "b"]
@@ -0,0 +1,82 @@
+import time
+from unittest.mock import MagicMock
+
+from source.elastic_handler import ElasticHandler
+from source.search_cache import SearchCache
+
+
+def test_lru_eviction():
+    cache = SearchCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("source.search_cache.time.monotonic", lambda: now[0])
+    cache = SearchCache(ttl=10)
+    cache.put("a", 1)
+
+    now[0] += 11
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = SearchCache(maxsize=0)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+
+
+def make_handler():
+    client = MagicMock()
+    client.options.return_value = client
+    client.exists.return_value = False
+    client.index.return_value = {"_id": "cv-1"}
+    client.search.side_effect = lambda **kwargs: {"hits": {"total": {"value": 0}, "hits": []}}
+    return ElasticHandler(client=client), client
+
+
+def test_repeated_search_is_served_from_cache():
+    handler, client = make_handler()
+
+    first = handler.search_cv_by_jd("Python  developer", "Build APIs")
+    second = handler.search_cv_by_jd("python developer", "build apis")
+
+    assert second is first
+    assert client.search.call_count == 1
+
+
+def test_indexing_invalidates_cached_results():
+    handler, client = make_handler()
+    handler.refresh_delay = 0.05
+    handler.search_cv_by_jd("Python developer", "Build APIs")
+
+    handler.index_cv({"cv_id": "cv-1", "skills": "Python"})
+    handler.search_cv_by_jd("Python developer", "Build APIs")
+
+    assert client.search.call_count == 2
+    # Không chờ refresh: kết quả cache trước khi CV tìm kiếm được bị bỏ sau refresh_delay
+    assert "refresh" not in client.index.call_args.kwargs
+    time.sleep(0.2)
+    handler.search_cv_by_jd("Python developer", "Build APIs")
+    assert client.search.call_count == 3
+
+
+def test_point_in_time_searches_are_not_cached():
+    handler, client = make_handler()
+
+    handler.search_cv_by_jd("Python developer", "", pit_id="pit")
+    handler.search_cv_by_jd("Python developer", "", pit_id="pit")
+
+    assert client.search.call_count == 2
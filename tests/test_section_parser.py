@@ -0,0 +1,39 @@
+from source.pdf_processor import SectionParser
+
+
+def test_splits_sections_in_document_order():
+    text = (
+        "John Doe Contact Information: john@example.com Profile Backend developer "
+        "Work Experience: Acme Corp 2020-2023 Education University of Science "
+        "Technical Skills: Python, Django"
+    )
+
+    sections = SectionParser().parse(text)
+
+    assert sections == {
+        "Contact Information": "john@example.com",
+        "Profile": "Backend developer",
+        "Experiences": "Acme Corp 2020-2023",
+        "Education": "University of Science",
+        "Skills": "Python, Django",
+    }
+
+
+def test_longest_synonym_wins():
+    sections = SectionParser().parse("Technical Skills: Python Key Skills: SQL")
+
+    # "Technical Skills" không bị tách thành "Technical" + mục "Skills"; chỉ giữ lần đầu của mỗi mục
+    assert sections == {"Skills": "Python Key Skills: SQL"}
+
+
+def test_header_must_start_at_word_boundary():
+    sections = SectionParser().parse("Summary of MySkills and Education: BSc")
+
+    assert sections == {"Education": "BSc"}
+
+
+def test_custom_headers_and_missing_sections():
+    parser = SectionParser({"Projects": ["Projects", "Side Projects"]})
+
+    assert parser.parse("Side Projects: search engine") == {"Projects": "search engine"}
+    assert parser.parse("nothing here") == {}
@@ -0,0 +1,49 @@
+import pytest
+
+from source.skill_taxonomy import SkillMatcher, get_default_matcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return get_default_matcher()
+
+
+def test_matches_aliases_to_canonical_ids(matcher):
+    text = "Python, MS Excel, Node.js and Golang; REST API design with React and Tally"
+
+    assert matcher.match(text) == ["python", "excel", "nodejs", "golang", "rest_api", "react", "tally"]
+
+
+def test_results_are_unique_and_ordered(matcher):
+    assert matcher.match("Excel, Python, MS Excel, python") == ["excel", "python"]
+
+
+@pytest.mark.parametrize("text", [
+    "go to market",
+    "less than",
+    "react quickly",
+    "the rest of the team",
+    "excel at tally counts",
+    "We go to market with less overhead and react quickly; the rest of the team will excel at tally counts.",
+])
+def test_common_words_are_not_skills(matcher, text):
+    assert matcher.match(text) == []
+
+
+def test_longest_alias_wins():
+    matcher = SkillMatcher({
+        "java": {"name": "Java", "aliases": ["Java"]},
+        "javascript": {"name": "JavaScript", "aliases": ["Java Script", "JavaScript"]},
+    })
+
+    assert matcher.match("Java Script and Java") == ["javascript", "java"]
+
+
+def test_case_sensitive_aliases_require_exact_case():
+    matcher = SkillMatcher({
+        "react": {"name": "React", "aliases": ["React", "ReactJS"], "case_sensitive": ["React"]},
+    })
+
+    assert matcher.match("React developer") == ["react"]
+    assert matcher.match("reactjs developer") == ["react"]
+    assert matcher.match("react quickly") == []